@@ -2,7 +2,7 @@ import logging
 import asyncio
 import argparse
 
-from app.cache import cache
+from app.cache import cache, delete
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
@@ -13,11 +13,11 @@ LOGGER.addHandler(ch)
 
 
 async def clean_cache(keys):
-    """Delete cache item from Redis by key."""
+    """Delete cache item from Redis and local caches of server workers by key."""
     LOGGER.debug("Started script for cache cleaning...")
     for key in keys:
         await cache.set("test", "test")
-        status = await cache.delete(key)
+        status = await delete(key)
         LOGGER.debug("Deleting key=<%s> from cache. Status: %s.", key, bool(status))
 
     LOGGER.debug("Finished script for cache cleaning.")
@@ -5,6 +5,7 @@ import logging
 
 import gino
 
+from app.config import POSTGRES_SHARD_DSNS
 from app.db import get_database_dsn
 
 
@@ -187,15 +188,14 @@ insert_mccs = """
 """
 
 
-async def _get_db_connection():
+async def _get_db_connection(dsn):
     """Return gino db connection."""
-    return await gino.Gino(get_database_dsn())
+    return await gino.Gino(dsn)
 
 
-async def seed_db():
-    """Executes operations in order to seed database."""
-    LOGGER.debug("Started script for seeding database...")
-    conn = await _get_db_connection()
+async def _seed_db(dsn):
+    """Seed database by provided dsn."""
+    conn = await _get_db_connection(dsn)
 
     categories_status, categories = await conn.status(conn.text(insert_mcc_categories))
     LOGGER.debug("Status of inserting mcc categories: %s:", categories_status)
@@ -207,6 +207,15 @@ async def seed_db():
     for mcc in mccs:
         LOGGER.debug("\t- %s", mcc)
 
+
+async def seed_db():
+    """Executes operations in order to seed primary database and each shard."""
+    LOGGER.debug("Started script for seeding database...")
+    # mcc tables are global, so they are replicated to each shard
+    dsns = dict.fromkeys([str(get_database_dsn()), *POSTGRES_SHARD_DSNS])
+    for dsn in dsns:
+        await _seed_db(dsn)
+
     LOGGER.debug("Finished script for seeding database.")
 
 
@@ -0,0 +1,43 @@
+"""This modules provides functionality to delete data of users marked as deleted."""
+
+import asyncio
+import logging
+
+from app import config
+from app.db import db, shards, get_database_dsn
+from app.models.user import User
+from app.utils.deletion import delete_user_data
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+ch = logging.StreamHandler()
+ch.setLevel(logging.DEBUG)
+LOGGER.addHandler(ch)
+
+
+async def cleanup():
+    """
+    Delete data of users marked as deleted on each shard. Data is deleted
+    the same way as by background deletion that did not finish.
+    """
+    LOGGER.debug("Started script for deleted users cleanup...")
+    await db.set_bind(get_database_dsn())
+    if config.POSTGRES_SHARD_DSNS:
+        await shards.connect(config.POSTGRES_SHARD_DSNS)
+
+    try:
+        for bind in shards.binds:
+            deleted_users = await bind.all(db.select([User.id]).where(User.deleted.isnot(None)))
+            for user in deleted_users:
+                await delete_user_data(user.id)
+    finally:
+        await shards.disconnect()
+        await db.pop_bind().close()
+
+    LOGGER.debug("Finished script for deleted users cleanup.")
+
+
+if __name__ == "__main__":
+    asyncio.run(cleanup())
@@ -0,0 +1,100 @@
+"""This modules provides check that hourly expenses report is served by index-only scan of expenses index."""
+
+import sys
+import json
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import gino
+
+from app.db import CompiledQuery, get_shard_dsns
+# models are imported, so foreign keys of transaction table are resolved
+from app.models.user import User  # pylint: disable=unused-import
+from app.models.transaction import Transaction
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+ch = logging.StreamHandler()
+ch.setLevel(logging.DEBUG)
+LOGGER.addHandler(ch)
+
+EXPENSE_INDEX_NAME = "transaction_user_expense_idx"
+
+# indexes of transaction partitions are attached to the index of partitioned table
+select_expense_indexes = """
+    SELECT inhrelid::regclass::text AS name
+      FROM pg_inherits
+     WHERE inhparent = CAST(:index_name AS regclass);
+"""
+
+# small tables are read by sequential scan anyway, so other scans are disabled
+# to check that the index can serve the query at all
+disable_other_scans = """
+    SET LOCAL enable_seqscan = off;
+    SET LOCAL enable_bitmapscan = off;
+"""
+
+
+async def _get_db_connection(dsn):
+    """Return gino db connection."""
+    return await gino.Gino(dsn)
+
+
+def _iterate_plan_nodes(plan):
+    """Iterate over provided plan node and all its children nodes."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _iterate_plan_nodes(child)
+
+
+async def _explain(connection, query):
+    """Return root node of JSON plan of provided sqlalchemy query."""
+    compiled = query.compile(dialect=CompiledQuery.dialect)
+    args = [compiled.params[name] for name in compiled.positiontup]
+    plan = await connection.raw_connection.fetchval(f"EXPLAIN (FORMAT JSON) {compiled.string}", *args)
+    return json.loads(plan)[0]["Plan"]
+
+
+async def check():
+    """Explain hourly expenses report on each shard. Return count of shards where index-only scan is not used."""
+    LOGGER.debug("Started expense index check...")
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=1)
+    query = Transaction.build_timeseries_query(0, start_date, end_date, "hour")
+
+    failed_count = 0
+    for dsn in get_shard_dsns():
+        conn = await _get_db_connection(dsn)
+        async with conn.acquire() as connection:
+            async with connection.transaction():
+                await connection.raw_connection.execute(disable_other_scans)
+                partition_indexes = await connection.all(
+                    conn.text(select_expense_indexes),
+                    index_name=EXPENSE_INDEX_NAME
+                )
+                expense_indexes = {EXPENSE_INDEX_NAME, *(index.name for index in partition_indexes)}
+
+                plan = await _explain(connection, query)
+
+        # partitions of transaction table are scanned, generated buckets are scanned as function
+        scans = [node for node in _iterate_plan_nodes(plan) if node.get("Relation Name", "").startswith("transaction")]
+        index_only = all(
+            node["Node Type"] == "Index Only Scan" and node.get("Index Name") in expense_indexes for node in scans
+        )
+        if not scans or not index_only:
+            failed_count += 1
+            LOGGER.error(
+                "Hourly expenses report does not use index-only scan of %s. Plan: %s",
+                EXPENSE_INDEX_NAME,
+                plan
+            )
+
+    LOGGER.debug("Finished expense index check. Failed shards: %s.", failed_count)
+    return failed_count
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(check()) else 0)
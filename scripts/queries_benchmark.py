@@ -0,0 +1,57 @@
+"""This modules provides benchmark of compiled queries against building and compiling them per call."""
+
+import timeit
+import logging
+import argparse
+
+from app.db import QUERY_REGISTRY, CompiledQuery
+# models register their hot queries on import
+from app.models.user import User  # pylint: disable=unused-import
+from app.models.budget import Budget  # pylint: disable=unused-import
+from app.models.limit import Limit  # pylint: disable=unused-import
+from app.models.transaction import Transaction  # pylint: disable=unused-import
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+ch = logging.StreamHandler()
+ch.setLevel(logging.DEBUG)
+LOGGER.addHandler(ch)
+
+
+def benchmark(number):
+    """Log per call CPU time of building and compiling every registered query versus reusing compiled one."""
+    LOGGER.debug("Started queries benchmark (%s calls per query)...", number)
+    total_compile, total_compiled = 0, 0
+    for query in sorted(QUERY_REGISTRY, key=lambda q: q.name):
+        compile_time = timeit.timeit(
+            lambda q=query: q.build().compile(dialect=CompiledQuery.dialect),
+            number=number
+        ) / number
+        compiled_time = timeit.timeit(lambda q=query: q.get_args({}), number=number) / number
+
+        total_compile += compile_time
+        total_compiled += compiled_time
+        LOGGER.debug(
+            "%-60s build+compile: %8.1fus compiled: %6.1fus",
+            query.name,
+            compile_time * 10 ** 6,
+            compiled_time * 10 ** 6
+        )
+
+    LOGGER.debug(
+        "Total per call of every query. build+compile: %.1fus compiled: %.1fus",
+        total_compile * 10 ** 6,
+        total_compiled * 10 ** 6
+    )
+    LOGGER.debug("Finished queries benchmark.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compiled queries.")
+    parser.add_argument("--number", help="calls count per query", type=int, default=1000)
+
+    args = parser.parse_args()
+
+    benchmark(args.number)
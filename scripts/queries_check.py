@@ -0,0 +1,50 @@
+"""This modules provides check that every compiled query executes on each shard database."""
+
+import sys
+import asyncio
+import logging
+
+import gino
+from asyncpg import exceptions
+
+from app.db import QUERY_REGISTRY, get_shard_dsns
+# models register their hot queries on import
+from app.models.user import User  # pylint: disable=unused-import
+from app.models.budget import Budget  # pylint: disable=unused-import
+from app.models.limit import Limit  # pylint: disable=unused-import
+from app.models.transaction import Transaction  # pylint: disable=unused-import
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+ch = logging.StreamHandler()
+ch.setLevel(logging.DEBUG)
+LOGGER.addHandler(ch)
+
+
+async def _get_db_connection(dsn):
+    """Return gino db connection."""
+    return await gino.Gino(dsn)
+
+
+async def check():
+    """Execute every registered query with its sample params. Return count of failed queries."""
+    LOGGER.debug("Started compiled queries check...")
+    failed_count = 0
+    for dsn in get_shard_dsns():
+        conn = await _get_db_connection(dsn)
+        async with conn.acquire() as connection:
+            for query in sorted(QUERY_REGISTRY, key=lambda q: q.name):
+                try:
+                    await query.warm(connection.raw_connection)
+                except exceptions.PostgresError as err:
+                    failed_count += 1
+                    LOGGER.error("Query=%s failed. Error: %s", query.name, err)
+
+    LOGGER.debug("Finished compiled queries check. Failed queries: %s.", failed_count)
+    return failed_count
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(check()) else 0)
@@ -0,0 +1,45 @@
+"""This modules provides functionality to move old transactions to archive."""
+
+import asyncio
+import logging
+
+import gino
+
+from app.config import POSTGRES_TRANSACTION_ARCHIVE_HORIZON_MONTHS
+from app.db import get_shard_dsns
+from app.utils.time import get_month_start
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+ch = logging.StreamHandler()
+ch.setLevel(logging.DEBUG)
+LOGGER.addHandler(ch)
+
+
+archive_transactions = """
+    SELECT archive_transactions(:horizon);
+"""
+
+
+async def _get_db_connection(dsn):
+    """Return gino db connection."""
+    return await gino.Gino(dsn)
+
+
+async def archive():
+    """Move transactions older than configured horizon to archive on each shard."""
+    LOGGER.debug("Started script for transactions archiving...")
+    horizon = get_month_start(POSTGRES_TRANSACTION_ARCHIVE_HORIZON_MONTHS)
+    for dsn in get_shard_dsns():
+        conn = await _get_db_connection(dsn)
+
+        archived_count = await conn.scalar(conn.text(archive_transactions), horizon=horizon.date())
+        LOGGER.debug("Archived %s transactions older than %s.", archived_count, horizon)
+
+    LOGGER.debug("Finished script for transactions archiving.")
+
+
+if __name__ == "__main__":
+    asyncio.run(archive())
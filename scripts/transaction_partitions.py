@@ -0,0 +1,46 @@
+"""This modules provides functionality to create upcoming transaction partitions."""
+
+import asyncio
+import logging
+
+import gino
+
+from app.config import POSTGRES_TRANSACTION_PARTITIONS_AHEAD
+from app.db import get_shard_dsns
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.setLevel(logging.DEBUG)
+
+ch = logging.StreamHandler()
+ch.setLevel(logging.DEBUG)
+LOGGER.addHandler(ch)
+
+
+create_transaction_partitions = """
+    SELECT create_transaction_partitions(:months_ahead);
+"""
+
+
+async def _get_db_connection(dsn):
+    """Return gino db connection."""
+    return await gino.Gino(dsn)
+
+
+async def create_partitions():
+    """Create transaction partitions on each shard from current month to configured months ahead."""
+    LOGGER.debug("Started script for transaction partitions creating...")
+    for dsn in get_shard_dsns():
+        conn = await _get_db_connection(dsn)
+
+        status, _ = await conn.status(
+            conn.text(create_transaction_partitions),
+            months_ahead=POSTGRES_TRANSACTION_PARTITIONS_AHEAD
+        )
+        LOGGER.debug("Status of creating transaction partitions: %s.", status)
+
+    LOGGER.debug("Finished script for transaction partitions creating.")
+
+
+if __name__ == "__main__":
+    asyncio.run(create_partitions())
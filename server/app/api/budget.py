@@ -8,6 +8,7 @@ from app.models.budget import Budget
 from app.utils.response import make_response
 from app.utils.errors import DatabaseError
 from app.utils.validators import validate_budget_savings, validate_budget_income
+from app.utils.money import to_minor_units, from_minor_units
 
 
 budget_routes = web.RouteTableDef()
@@ -28,9 +29,11 @@ class UserProfileBudgetView(web.View):
                 http_status=HTTPStatus.BAD_REQUEST
             )
 
+        budget_data = budget.as_dict()
+        budget_data["income"] = from_minor_units(budget.income)
         return make_response(
             success=True,
-            data=budget.as_dict(),
+            data=budget_data,
             http_status=HTTPStatus.OK
         )
 
@@ -48,7 +51,7 @@ class UserProfileBudgetView(web.View):
             )
 
         try:
-            await Budget.update_budget(self.request.user_id, savings, income)
+            await Budget.update_budget(self.request.user_id, savings, to_minor_units(income))
         except DatabaseError as err:
             return make_response(
                 success=False,
@@ -4,11 +4,16 @@ from http import HTTPStatus
 
 from aiohttp import web
 
+from app.db import POOL_MONITORS, QUERY_STATS
+from app.cache import local_cache
 from app.utils.response import make_response
 
 
 internal_routes = web.RouteTableDef()
 
+QUERY_STATS_DEFAULT_LIMIT = 20
+QUERY_STATS_ORDER_FIELDS = ("total_time", "max_time", "count", "slow_count")
+
 
 @internal_routes.get("/v1/health")
 async def health_view(request):
@@ -20,6 +25,59 @@ async def health_view(request):
     )
 
 
+@internal_routes.get("/v1/internal/db/pool")
+async def db_pool_view(_request):
+    """Return telemetry of database connection pools of current worker."""
+    return make_response(
+        success=True,
+        data=[monitor.as_dict() for monitor in POOL_MONITORS],
+        http_status=HTTPStatus.OK
+    )
+
+
+@internal_routes.get("/v1/internal/db/queries")
+async def db_queries_view(request):
+    """Return top database queries of current worker by execution time."""
+    order_by = request.query.get("order_by", "total_time")
+    if order_by not in QUERY_STATS_ORDER_FIELDS:
+        return make_response(
+            success=False,
+            message=f"Query argument order_by is not correct. Expected one of: {', '.join(QUERY_STATS_ORDER_FIELDS)}.",
+            http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+        )
+
+    try:
+        limit = int(request.query.get("limit", QUERY_STATS_DEFAULT_LIMIT))
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return make_response(
+            success=False,
+            message="Query argument limit is not correct. Expected positive integer.",
+            http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+        )
+
+    return make_response(
+        success=True,
+        data={
+            "slow_threshold_ms": round(QUERY_STATS.slow_threshold * 1000, 3),
+            "dropped_count": QUERY_STATS.dropped_count,
+            "queries": QUERY_STATS.top(limit, order_by),
+        },
+        http_status=HTTPStatus.OK
+    )
+
+
+@internal_routes.get("/v1/internal/cache/local")
+async def local_cache_view(_request):
+    """Return statistics of local cache of current worker."""
+    return make_response(
+        success=True,
+        data=local_cache.as_dict(),
+        http_status=HTTPStatus.OK
+    )
+
+
 async def handle_404(request):
     """Return custom response for 404 http status code."""
     return make_response(
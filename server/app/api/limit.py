@@ -9,8 +9,9 @@ from app.models.limit import Limit
 from app.models.mcc import MCCCategory
 from app.models.transaction import Transaction
 from app.utils.response import make_response
-from app.utils.errors import DatabaseError
+from app.utils.errors import DatabaseError, DBNoResultFoundError, DBPermissionDeniedError
 from app.utils.validators import validate_limit_amount
+from app.utils.money import to_minor_units, from_minor_units, format_amounts
 
 
 limit_routes = web.RouteTableDef()
@@ -60,11 +61,11 @@ class BudgetLimitsView(web.View):
         # set spent amount for each limit
         for limit in limits:
             spending = next((item for item in spendings if item["name"] == limit["name"]), {})
-            limit["spent"] = spending.get("amount", "0.0")
+            limit["spent"] = spending.get("amount", 0)
 
         return make_response(
             success=True,
-            data=limits,
+            data=format_amounts(limits, "balance", "spent"),
             http_status=HTTPStatus.OK
         )
 
@@ -99,7 +100,7 @@ class BudgetLimitsView(web.View):
             )
 
         try:
-            limit = await Limit.create(self.request.user_id, category.id, amount)
+            limit = await Limit.create(self.request.user_id, category.id, to_minor_units(amount))
         except DatabaseError as err:
             return make_response(
                 success=False,
@@ -108,6 +109,7 @@ class BudgetLimitsView(web.View):
             )
 
         response_data = {"category": category_name, **limit.as_dict()}
+        response_data["amount"] = from_minor_units(limit.amount)
         return make_response(
             success=True,
             message="The budget limit for user was created.",
@@ -143,23 +145,19 @@ class LimitView(web.View):
 
         limit_id = int(self.request.match_info["limit_id"])
         try:
-            limit = await Limit.get_by_id(limit_id)
-        except DatabaseError as err:
+            await Limit.update(self.request.user_id, limit_id, to_minor_units(amount))
+        except DBPermissionDeniedError as err:
             return make_response(
                 success=False,
                 message=str(err),
-                http_status=HTTPStatus.BAD_REQUEST
+                http_status=HTTPStatus.FORBIDDEN
             )
-
-        if limit.user_id != self.request.user_id:
+        except DBNoResultFoundError as err:
             return make_response(
                 success=False,
-                message="You don't have permission to edit this limit.",
-                http_status=HTTPStatus.FORBIDDEN
+                message=str(err),
+                http_status=HTTPStatus.NOT_FOUND
             )
-
-        try:
-            await Limit.update(limit.id, amount)
         except DatabaseError as err:
             return make_response(
                 success=False,
@@ -176,25 +174,20 @@ class LimitView(web.View):
     async def delete(self):
         """Delete user's budget limit."""
         limit_id = int(self.request.match_info["limit_id"])
-
         try:
-            limit = await Limit.get_by_id(limit_id)
-        except DatabaseError as err:
+            await Limit.delete(self.request.user_id, limit_id)
+        except DBPermissionDeniedError as err:
             return make_response(
                 success=False,
                 message=str(err),
-                http_status=HTTPStatus.BAD_REQUEST
+                http_status=HTTPStatus.FORBIDDEN
             )
-
-        if limit.user_id != self.request.user_id:
+        except DBNoResultFoundError as err:
             return make_response(
                 success=False,
-                message="You don't have permission to delete this limit.",
-                http_status=HTTPStatus.FORBIDDEN
+                message=str(err),
+                http_status=HTTPStatus.NOT_FOUND
             )
-
-        try:
-            await Limit.delete(limit_id)
         except DatabaseError as err:
             return make_response(
                 success=False,
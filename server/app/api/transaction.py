@@ -1,14 +1,18 @@
 """This module provides transactions views."""
 
+import json
 from http import HTTPStatus
 from datetime import datetime, timedelta
 
 from aiohttp import web
 
-from app.models.transaction import Transaction
-from app.utils.response import make_response
+from app.models.transaction import Transaction, TIMESERIES_INTERVALS, TIMESERIES_MAX_BUCKETS, SEARCH_MIN_LENGTH
+from app.utils.response import make_response, make_raw_response
 from app.utils.errors import DatabaseError
-from app.utils.time import DATETIME_FORMAT, DATE_FORMAT, generate_days_period
+from app.utils.time import DATETIME_FORMAT, get_buckets_count
+from app.utils.money import format_amounts
+from app.utils.export import EXPORT_WRITERS
+from app.utils.pagination import decode_cursor, decode_change_token, parse_page_limit
 
 
 transaction_routes = web.RouteTableDef()
@@ -34,9 +38,102 @@ class TransactionsView(web.View):
                 http_status=HTTPStatus.UNPROCESSABLE_ENTITY
             )
 
+        try:
+            limit = parse_page_limit(self.request.query.get("limit"))
+        except (TypeError, ValueError):
+            return make_response(
+                success=False,
+                message="Query argument limit is not correct. Expected positive integer.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        cursor = self.request.query.get("cursor")
+        if cursor:
+            try:
+                cursor_timestamp, cursor_id = decode_cursor(cursor)
+                cursor = cursor_timestamp, int(cursor_id)
+            except (TypeError, ValueError):
+                return make_response(
+                    success=False,
+                    message="Query argument cursor is not correct.",
+                    http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+                )
+
         category = self.request.query.get("category")
+        json_responses_enabled = self.request.app.config.POSTGRES_JSON_RESPONSES_ENABLED
+        get_transactions = Transaction.get_transactions
+        if json_responses_enabled:
+            get_transactions = Transaction.get_transactions_json
+        try:
+            transactions, next_cursor = await get_transactions(
+                self.request.user_id,
+                category,
+                start_date,
+                end_date,
+                limit,
+                cursor
+            )
+        except DatabaseError as err:
+            return make_response(
+                success=False,
+                message=str(err),
+                http_status=HTTPStatus.BAD_REQUEST
+            )
+
+        if json_responses_enabled:
+            return make_raw_response(
+                success=True,
+                raw_data=f'{{"transactions": {transactions}, "next_cursor": {json.dumps(next_cursor)}}}',
+                http_status=HTTPStatus.OK,
+            )
+
+        response_data = {
+            "transactions": format_amounts(transactions, "amount", "balance", "cashback"),
+            "next_cursor": next_cursor
+        }
+        return make_response(
+            success=True,
+            data=response_data,
+            http_status=HTTPStatus.OK,
+        )
+
+
+@transaction_routes.view("/v1/transactions/changes")
+class TransactionsChangesView(web.View):
+    """Views to synchronize user`s transactions incrementally."""
+
+    async def get(self):
+        """
+        Retrieve user`s transactions inserted or updated since provided change token.
+        Deleted transactions are not reported by the feed. Transactions that are changed
+        and archived between two synchronizations are missed, so client that has not
+        synchronized for longer than archive horizon should synchronize whole history.
+        """
+        try:
+            limit = parse_page_limit(self.request.query.get("limit"))
+        except (TypeError, ValueError):
+            return make_response(
+                success=False,
+                message="Query argument limit is not correct. Expected positive integer.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        since = self.request.query.get("since")
+        if since:
+            try:
+                since = decode_change_token(since)
+            except (TypeError, ValueError):
+                return make_response(
+                    success=False,
+                    message="Query argument since is not correct.",
+                    http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+                )
+        else:
+            # without change token the whole history (including archive) is synchronized
+            since = 0, 0, True
+
         try:
-            result = await Transaction.get_transactions(self.request.user_id, category, start_date, end_date)
+            transactions, next_token, has_more = await Transaction.get_changes(self.request.user_id, since, limit)
         except DatabaseError as err:
             return make_response(
                 success=False,
@@ -44,9 +141,114 @@ class TransactionsView(web.View):
                 http_status=HTTPStatus.BAD_REQUEST
             )
 
+        response_data = {
+            "transactions": format_amounts(transactions, "amount", "balance", "cashback"),
+            "next_token": next_token,
+            "has_more": has_more
+        }
         return make_response(
             success=True,
-            data=result,
+            data=response_data,
+            http_status=HTTPStatus.OK,
+        )
+
+
+@transaction_routes.view("/v1/transactions/export")
+class TransactionsExportView(web.View):
+    """Views to export user`s transactions history."""
+
+    async def get(self):
+        """Stream all user`s transactions in requested format."""
+        export_format = self.request.query.get("format", "csv")
+        writer_class = EXPORT_WRITERS.get(export_format)
+        if writer_class is None:
+            return make_response(
+                success=False,
+                message=f"Query argument format is not correct. Expected one of: {', '.join(EXPORT_WRITERS)}.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        writer = writer_class()
+        response = web.StreamResponse(
+            status=HTTPStatus.OK,
+            headers={
+                "Content-Type": writer.content_type,
+                "Content-Disposition": f'attachment; filename="transactions.{writer.extension}"'
+            }
+        )
+        response.enable_chunked_encoding()
+        await response.prepare(self.request)
+
+        # headers are already sent, so database error interrupts the stream and client gets incomplete body
+        chunks = Transaction.iterate_history(self.request.user_id, self.request.app.config.POSTGRES_EXPORT_CHUNK_SIZE)
+        try:
+            async for transactions in chunks:
+                await response.write(writer.write(format_amounts(transactions, "amount", "balance", "cashback")))
+        finally:
+            # release cursor connection even if client has disconnected in the middle of the stream
+            await chunks.aclose()
+
+        await response.write(writer.close())
+        await response.write_eof()
+        return response
+
+
+@transaction_routes.view("/v1/transactions/search")
+class TransactionsSearchView(web.View):
+    """Views to search user`s transactions."""
+
+    async def get(self):
+        """Retrieve user`s transactions which info contains provided text."""
+        text = self.request.query.get("q", "").strip()
+        if len(text) < SEARCH_MIN_LENGTH:
+            return make_response(
+                success=False,
+                message=f"Query argument q is not correct. Expected at least {SEARCH_MIN_LENGTH} characters.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        try:
+            limit = parse_page_limit(self.request.query.get("limit"))
+        except (TypeError, ValueError):
+            return make_response(
+                success=False,
+                message="Query argument limit is not correct. Expected positive integer.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        cursor = self.request.query.get("cursor")
+        if cursor:
+            try:
+                cursor_timestamp, cursor_id = decode_cursor(cursor)
+                cursor = cursor_timestamp, int(cursor_id)
+            except (TypeError, ValueError):
+                return make_response(
+                    success=False,
+                    message="Query argument cursor is not correct.",
+                    http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+                )
+
+        try:
+            transactions, next_cursor = await Transaction.search_transactions(
+                self.request.user_id,
+                text,
+                limit,
+                cursor
+            )
+        except DatabaseError as err:
+            return make_response(
+                success=False,
+                message=str(err),
+                http_status=HTTPStatus.BAD_REQUEST
+            )
+
+        response_data = {
+            "transactions": format_amounts(transactions, "amount", "balance", "cashback"),
+            "next_cursor": next_cursor
+        }
+        return make_response(
+            success=True,
+            data=response_data,
             http_status=HTTPStatus.OK,
         )
 
@@ -80,7 +282,7 @@ class TransactionMonthReportView(web.View):
             )
 
         response_data = {
-            "categories": categories_reports,
+            "categories": format_amounts(categories_reports, "amount"),
             "year": year,
             "month": month
         }
@@ -110,8 +312,12 @@ class TransactionDailyReportView(web.View):
                 http_status=HTTPStatus.UNPROCESSABLE_ENTITY
             )
 
+        json_responses_enabled = self.request.app.config.POSTGRES_JSON_RESPONSES_ENABLED
+        get_daily_reports = Transaction.get_daily_reports
+        if json_responses_enabled:
+            get_daily_reports = Transaction.get_daily_reports_json
         try:
-            daily_reports = await Transaction.get_daily_reports(self.request.user_id, start_date, end_date)
+            daily_reports = await get_daily_reports(self.request.user_id, start_date, end_date)
         except DatabaseError as err:
             return make_response(
                 success=False,
@@ -119,14 +325,78 @@ class TransactionDailyReportView(web.View):
                 http_status=HTTPStatus.BAD_REQUEST
             )
 
-        daily_budgets_map = {budget["date"]: budget["amount"] for budget in daily_reports}
-        response_data = [{
-            "date": day.strftime(DATE_FORMAT),
-            "amount": daily_budgets_map.get(day, "0")
-        } for day in generate_days_period(start_date, end_date)]
+        if json_responses_enabled:
+            return make_raw_response(
+                success=True,
+                raw_data=daily_reports,
+                http_status=HTTPStatus.OK,
+            )
 
         return make_response(
             success=True,
-            data=response_data,
+            data=format_amounts(daily_reports, "amount"),
+            http_status=HTTPStatus.OK,
+        )
+
+
+@transaction_routes.view("/v1/transactions/report/timeseries")
+class TransactionTimeseriesReportView(web.View):
+    """Views to interact with transaction reports grouped by time interval."""
+
+    async def get(self):
+        """Retrieve transactions reports for provided user, period and interval."""
+        try:
+            start_date = datetime.strptime(self.request.query["start_date"], DATETIME_FORMAT)
+            end_date = datetime.strptime(self.request.query["end_date"], DATETIME_FORMAT)
+        except KeyError:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=7)
+        except (TypeError, ValueError):
+            return make_response(
+                success=False,
+                message="Query arguments start_date or end_date is not correct. "
+                        f"Expected strings: {DATETIME_FORMAT}.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        interval = self.request.query.get("interval", "day")
+        if interval not in TIMESERIES_INTERVALS:
+            return make_response(
+                success=False,
+                message=f"Query argument interval is not correct. Expected one of: {', '.join(TIMESERIES_INTERVALS)}.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        max_buckets = TIMESERIES_MAX_BUCKETS[interval]
+        if get_buckets_count(start_date, end_date, interval) > max_buckets:
+            return make_response(
+                success=False,
+                message=f"Requested period is too long. Expected at most {max_buckets} {interval} buckets.",
+                http_status=HTTPStatus.UNPROCESSABLE_ENTITY
+            )
+
+        json_responses_enabled = self.request.app.config.POSTGRES_JSON_RESPONSES_ENABLED
+        get_reports = Transaction.get_timeseries_reports
+        if json_responses_enabled:
+            get_reports = Transaction.get_timeseries_reports_json
+        try:
+            reports = await get_reports(self.request.user_id, start_date, end_date, interval)
+        except DatabaseError as err:
+            return make_response(
+                success=False,
+                message=str(err),
+                http_status=HTTPStatus.BAD_REQUEST
+            )
+
+        if json_responses_enabled:
+            return make_raw_response(
+                success=True,
+                raw_data=reports,
+                http_status=HTTPStatus.OK,
+            )
+
+        return make_response(
+            success=True,
+            data=format_amounts(reports, "amount"),
             http_status=HTTPStatus.OK,
         )
@@ -12,6 +12,7 @@ from app.models.user import User
 from app.utils.response import make_response
 from app.utils.errors import DatabaseError
 from app.utils.monobank import setup_webhook, save_user_monobank_info, save_monobank_month_transactions
+from app.utils.deletion import delete_user_data
 
 
 user_routes = web.RouteTableDef()
@@ -39,9 +40,9 @@ class UserView(web.View):
         )
 
     async def delete(self):
-        """Delete user and his data from system."""
+        """Mark user as deleted and delete his data from system in background."""
         try:
-            await User.delete(self.request.user_id)
+            await User.mark_deleted(self.request.user_id)
         except DatabaseError as err:
             return make_response(
                 success=False,
@@ -49,6 +50,8 @@ class UserView(web.View):
                 http_status=HTTPStatus.BAD_REQUEST
             )
 
+        await spawn(self.request, delete_user_data(self.request.user_id))
+
         return make_response(
             success=True,
             message="The user was deleted successfully.",
@@ -1,10 +1,21 @@
 """This module provides functionality for cache interactions."""
 
+import json
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+
 from aiocache import Cache
 
 from app import config
+from app.utils.serializer import EnvelopeSerializer
+
+
+LOGGER = logging.getLogger(__name__)
 
-MONTH_REPORT_CACHE_KEY = "month-report--{user_id}-{month}-{year}"
+MONTH_REPORT_CACHE_KEY = "month-report-v3--{user_id}-{generation}-{month}-{year}"
 MONTH_REPORT_CACHE_EXPIRE = 60 * 60 * 24 * 30  # 30 days
 MCC_CODES_CACHE_KEY = "mcc-codes"
 MCC_CATEGORIES_CACHE_KEY = "mcc-categories"
@@ -14,5 +25,254 @@ RESET_PASSWORD_CACHE_KEY = "reset-password--{code}"
 RESET_PASSWORD_CACHE_EXPIRE = 60 * 60 * 24  # 24h
 TELEGRAM_CACHE_KEY = "telegram--{code}"
 TELEGRAM_CACHE_EXPIRE = 60 * 60  # 1h
+GENERATION_CACHE_KEY = "generation--{namespace}--{user_id}"
+GENERATION_LOCAL_CACHE_EXPIRE = 5  # 5s
+ALL_USERS_GENERATION = "all"
+TRANSACTIONS_GENERATION = "transactions"
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+CACHE_INVALIDATION_HEALTH_CHECK_INTERVAL = 30  # 30s
+CACHE_INVALIDATION_RECONNECT_INTERVAL = 5  # 5s
+LOCAL_CACHE_INVALIDATION_CHANNEL = "local-cache-invalidation"
+CACHE_LOCK_KEY = "lock--{key}"
+CACHE_LOCK_EXPIRE = 10  # 10s
+CACHE_LOCK_POLL_INTERVAL = 0.05  # 50ms
+CACHE_LOCK_RELEASE_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then"
+    " return redis.call('del', KEYS[1])"
+    " else"
+    " return 0"
+    " end"
+)
+
+
+class LocalCache:
+    """
+    Class that represents in-process LRU cache with expiration. It is the first tier
+    in front of redis cache for near-static values, so cached values are shared between
+    requests of the worker and must not be mutated.
+    """
+
+    def __init__(self, max_size, ttl):
+        """Initialize empty cache with max count of items and max expiration in seconds."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        """Return cached value by key or None in case it is missing or expired."""
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Cache value by key evicting the least recently used items in case cache is full."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        """Remove cached value by key."""
+        if self._items.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        """Remove all cached values."""
+        self.invalidations += len(self._items)
+        self._items.clear()
+
+    def as_dict(self):
+        """Return cache statistics in dictionary format."""
+        requests_count = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests_count, 3) if requests_count else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
 
 cache = Cache.from_url(config.REDIS_URL)
+if config.CACHE_SERIALIZER == "msgpack":
+    cache.serializer = EnvelopeSerializer(config.CACHE_COMPRESSION, config.CACHE_COMPRESSION_MIN_SIZE)
+local_cache = LocalCache(config.CACHE_LOCAL_MAX_SIZE, config.CACHE_LOCAL_TTL)
+_computations = {}
+
+
+async def get_or_compute(key, compute, ttl=None):
+    """
+    Return cached value by key from local or redis cache or compute and cache it in case of miss. Concurrent
+    misses of the same key share one computation within worker, and workers across
+    the cluster wait for the one that holds redis lock of the key. Empty values are not cached.
+    """
+    value = local_cache.get(key)
+    if value:
+        return value
+
+    value = await cache.get(key)
+    if value:
+        local_cache.set(key, value, ttl)
+        return value
+
+    computation = _computations.get(key)
+    if computation is None:
+        computation = asyncio.ensure_future(_compute_once(key, compute, ttl))
+        computation.add_done_callback(lambda _: _computations.pop(key, None))
+        _computations[key] = computation
+
+    # cancelled waiter must not cancel computation that is shared with other waiters
+    value = await asyncio.shield(computation)
+    if value:
+        local_cache.set(key, value, ttl)
+
+    return value
+
+
+async def delete(key):
+    """Delete cached value by key from redis and local caches of all workers. Return redis delete status."""
+    status = await cache.delete(key)
+    local_cache.delete(key)
+    await cache.raw("publish", LOCAL_CACHE_INVALIDATION_CHANNEL, key)
+    return status
+
+
+async def _compute_once(key, compute, ttl):
+    """Compute and cache value holding redis lock of the key or wait until lock holder caches it."""
+    lock_key = CACHE_LOCK_KEY.format(key=key)
+    token = uuid.uuid4().hex
+    # lock is raw redis value, so it does not depend on cache serializer
+    while not await cache.raw("set", lock_key, token, expire=CACHE_LOCK_EXPIRE, exist="SET_IF_NOT_EXIST"):
+        await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+        value = await cache.get(key)
+        if value:
+            return value
+
+    try:
+        # value may have been cached by previous lock holder between the first read and lock acquire
+        value = await cache.get(key)
+        if value:
+            return value
+
+        value = await compute()
+        if value:
+            await cache.set(key, value, ttl)
+    finally:
+        await cache.raw("eval", CACHE_LOCK_RELEASE_SCRIPT, [lock_key], [token])
+
+    return value
+
+
+async def get_generation(namespace, user_id):
+    """
+    Return current generation of user`s cached data in provided namespace.
+    It consists of generations of the namespace for all users and for the user.
+    """
+    key = GENERATION_CACHE_KEY.format(namespace=namespace, user_id=user_id)
+    generation = local_cache.get(key)
+    if generation is None:
+        all_users_key = GENERATION_CACHE_KEY.format(namespace=namespace, user_id=ALL_USERS_GENERATION)
+        all_users_generation, user_generation = await cache.raw("mget", all_users_key, key)
+        generation = f"{int(all_users_generation or 0)}.{int(user_generation or 0)}"
+        # short expiration bounds staleness of generation read right before it was bumped
+        local_cache.set(key, generation, GENERATION_LOCAL_CACHE_EXPIRE)
+
+    return generation
+
+
+async def bump_generation(namespace, user_id, publish=True):
+    """
+    Invalidate all user`s cached data in provided namespace by incrementing its generation.
+    Values cached with previous generations are not read anymore and expire by themselves.
+    """
+    key = GENERATION_CACHE_KEY.format(namespace=namespace, user_id=user_id)
+    # generation never expires, otherwise it could return to value of still cached data
+    await cache.raw("incr", key)
+    local_cache.delete(key)
+    if publish:
+        await cache.raw("publish", LOCAL_CACHE_INVALIDATION_CHANNEL, key)
+
+
+def get_invalidated_keys(notification):
+    """Return cache keys affected by database change notification."""
+    table = notification.get("table")
+    if table == "mcc":
+        return [MCC_CODES_CACHE_KEY]
+    if table == "mcc_category":
+        return [MCC_CATEGORIES_CACHE_KEY]
+
+    return []
+
+
+def get_invalidated_generations(notification):
+    """Return (namespace, user_id) generations affected by database change notification."""
+    if notification.get("table") == "transaction":
+        return [(TRANSACTIONS_GENERATION, notification["user_id"])]
+
+    return []
+
+
+async def invalidate_cache(payload):
+    """Delete cache keys affected by database change notification payload."""
+    try:
+        notification = json.loads(payload)
+        keys = get_invalidated_keys(notification)
+        generations = get_invalidated_generations(notification)
+    except (ValueError, KeyError) as err:
+        LOGGER.error("Could not parse cache invalidation notification=%s. Error: %s", payload, err)
+        return
+
+    # every worker receives database notification, so local cache invalidation is not published;
+    # generation is bumped by each worker, that only makes it grow faster
+    for namespace, user_id in generations:
+        await bump_generation(namespace, user_id, publish=False)
+
+    for key in keys:
+        await cache.delete(key)
+        local_cache.delete(key)
+
+
+async def invalidate_notified_cache():
+    """
+    Invalidate all cached data that is invalidated by database change notifications.
+    It is used when notifications may have been missed, e.g. listening connection was lost.
+    """
+    all_users_key = GENERATION_CACHE_KEY.format(namespace=TRANSACTIONS_GENERATION, user_id=ALL_USERS_GENERATION)
+    await cache.raw("incr", all_users_key)
+    await cache.delete(MCC_CODES_CACHE_KEY)
+    await cache.delete(MCC_CATEGORIES_CACHE_KEY)
+    local_cache.clear()
+
+
+def handle_invalidation_notification(_connection, _pid, _channel, payload):
+    """Schedule cache invalidation on asyncpg notification."""
+    asyncio.ensure_future(invalidate_cache(payload))
+
+
+async def listen_local_cache_invalidation(channel):
+    """Remove keys received from redis invalidation channel from local cache."""
+    async for key in channel.iter(encoding="utf-8"):
+        local_cache.delete(key)
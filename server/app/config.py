@@ -14,6 +14,7 @@ SERVER_MODE = os.getenv("SERVER_MODE", "DEV")
 SERVER_HOST = os.getenv("SERVER_HOST", "localhost")
 COLLECTOR_HOST = os.getenv("COLLECTOR_HOST")
 COLLECTOR_WEBHOOK_SECRET = os.getenv("MONOBANK_WEBHOOK_SECRET")
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
 
 # SMTP stuff
 SMTP_HOST = "smtp.gmail.com"
@@ -34,8 +35,20 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "spentless")
 POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1"))
 POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "16"))
+POSTGRES_POOL_ADAPTIVE = os.getenv("POSTGRES_POOL_ADAPTIVE", "false").lower() == "true"
+POSTGRES_POOL_ADAPT_INTERVAL = int(os.getenv("POSTGRES_POOL_ADAPT_INTERVAL", "10"))
+POSTGRES_POOL_GROW_WAIT_MS = int(os.getenv("POSTGRES_POOL_GROW_WAIT_MS", "50"))
 POSTGRES_RETRY_LIMIT = int(os.getenv("POSTGRES_RETRY_LIMIT", "32"))
 POSTGRES_RETRY_INTERVAL = int(os.getenv("POSTGRES_RETRY_INTERVAL", "1"))
+POSTGRES_COMPILED_QUERIES_ENABLED = os.getenv("POSTGRES_COMPILED_QUERIES_ENABLED", "true").lower() == "true"
+POSTGRES_QUERY_STATS_ENABLED = os.getenv("POSTGRES_QUERY_STATS_ENABLED", "true").lower() == "true"
+POSTGRES_QUERY_STATS_SIZE = int(os.getenv("POSTGRES_QUERY_STATS_SIZE", "500"))
+POSTGRES_SLOW_QUERY_MS = int(os.getenv("POSTGRES_SLOW_QUERY_MS", "200"))
+POSTGRES_JSON_RESPONSES_ENABLED = os.getenv("POSTGRES_JSON_RESPONSES_ENABLED", "false").lower() == "true"
+POSTGRES_TRANSACTION_PARTITIONS_AHEAD = int(os.getenv("POSTGRES_TRANSACTION_PARTITIONS_AHEAD", "3"))
+POSTGRES_TRANSACTION_ARCHIVE_HORIZON_MONTHS = int(os.getenv("POSTGRES_TRANSACTION_ARCHIVE_HORIZON_MONTHS", "12"))
+POSTGRES_DELETION_BATCH_SIZE = int(os.getenv("POSTGRES_DELETION_BATCH_SIZE", "1000"))
+POSTGRES_EXPORT_CHUNK_SIZE = int(os.getenv("POSTGRES_EXPORT_CHUNK_SIZE", "1000"))
 POSTGRES_DSN_STAGING = os.getenv("DATABASE_URL")
 POSTGRES_DSN_DEV = URL(
     drivername=POSTGRES_DRIVER_NAME,
@@ -46,8 +59,21 @@ POSTGRES_DSN_DEV = URL(
     database=POSTGRES_DB,
 )
 
+POSTGRES_REPLICA_DSN = os.getenv("POSTGRES_REPLICA_DSN")
+# comma separated dsns, new shards must be appended to the end of the list
+POSTGRES_SHARD_DSNS = [dsn for dsn in os.getenv("POSTGRES_SHARD_DSNS", "").split(",") if dsn]
+POSTGRES_SHARD_VIRTUAL_NODES = int(os.getenv("POSTGRES_SHARD_VIRTUAL_NODES", "64"))
+# users with lower ids were created before sharding was enabled and stay on primary database
+POSTGRES_SHARD_START_USER_ID = int(os.getenv("POSTGRES_SHARD_START_USER_ID", "1"))
+
 # REDIS stuff
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+CACHE_LOCAL_MAX_SIZE = int(os.getenv("CACHE_LOCAL_MAX_SIZE", "1024"))
+CACHE_LOCAL_TTL = int(os.getenv("CACHE_LOCAL_TTL", "60"))
+# json (aiocache default) or msgpack, compression of msgpack values: none, zstd or lz4
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "msgpack")
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "none")
+CACHE_COMPRESSION_MIN_SIZE = int(os.getenv("CACHE_COMPRESSION_MIN_SIZE", "1024"))
 
 # Telegram stuff
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -1,13 +1,642 @@
 """This module provides functionality for database interactions."""
 
+import re
+import sys
+import time
+import bisect
+import asyncio
+import hashlib
+import logging
+import functools
+import contextvars
+
+import gino
+from asyncpg import Connection, exceptions
+from gino.dialects.asyncpg import AsyncpgDialect, Pool
 from gino.ext.aiohttp import Gino
 
 from app import config
 
 
+LOGGER = logging.getLogger(__name__)
+REPLICA_FALLBACK_ERRORS = (OSError, exceptions.PostgresConnectionError, exceptions.InterfaceError)
+POOL_WAIT_EWMA_WEIGHT = 0.2
+POOL_MONITORS = []
+# connections acquired in context with this flag are held for the whole worker lifetime, e.g. LISTEN connections
+DEDICATED_ACQUIRE = contextvars.ContextVar("dedicated_acquire", default=False)
+
+QUERY_NORMALIZE_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(...)"),
+    (re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+"), "(...), ..."),
+    (re.compile(r"\s+"), " "),
+)
+
 db = Gino()
 
 
 def get_database_dsn():
     """Return database dsn based on server mode."""
     return getattr(config, f"POSTGRES_DSN_{config.SERVER_MODE}")
+
+
+def get_shard_dsns():
+    """Return dsns of databases that store users data."""
+    if not config.POSTGRES_SHARD_DSNS:
+        return [get_database_dsn()]
+
+    if config.POSTGRES_SHARD_START_USER_ID > 1:
+        return [get_database_dsn(), *config.POSTGRES_SHARD_DSNS]
+
+    return config.POSTGRES_SHARD_DSNS
+
+
+class PoolMonitor:
+    """
+    Class that collects connection pool acquire telemetry.
+    In adaptive mode it also limits count of connections that may be
+    acquired at once, growing the limit up to max size while acquire wait
+    time is high and shrinking it down to min size while pool is underused.
+    Connections above the limit become idle and are closed by asyncpg
+    after max inactive connection lifetime. Dedicated connections, that are
+    held for the whole worker lifetime, are not limited but take their place
+    in the pool, so they are excluded from the sizing.
+    """
+
+    def __init__(self, name, min_size, max_size, adaptive=False, get_idle_size=None):
+        """Initialize monitor for pool with provided size bounds and function that returns idle connections count."""
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.adaptive = adaptive
+        self.size = min_size if adaptive else max_size
+        self.in_use = 0
+        self.dedicated = 0
+        self.waiting = 0
+        self.acquire_count = 0
+        self.acquire_time_total = 0
+        self.acquire_time_max = 0
+        self.acquire_time_ewma = 0
+        self._get_idle_size = get_idle_size
+        self._peak_in_use = 0
+        self._adapted_at = time.monotonic()
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, acquire_connection, timeout=None):
+        """
+        Acquire connection by provided coroutine function recording acquire wait time.
+        Timeout bounds both waiting for acquire permit and acquiring the connection.
+        """
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._acquire_permit(), timeout)
+            if timeout is not None:
+                timeout = max(timeout - (time.monotonic() - started), 0)
+
+            try:
+                connection = await acquire_connection(timeout=timeout)
+            except BaseException:
+                await self.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self._record(time.monotonic() - started)
+        return connection
+
+    async def _acquire_permit(self):
+        """Wait for acquire permit. In adaptive mode pool grows while permit is waited too long."""
+        grow_wait_time = config.POSTGRES_POOL_GROW_WAIT_MS / 1000
+        async with self._condition:
+            while not self._has_permit():
+                if not self.adaptive or self.size >= self.max_size:
+                    await self._condition.wait()
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._condition.wait(), grow_wait_time)
+                except asyncio.TimeoutError:
+                    if not self._has_permit() and self.size < self.max_size:
+                        self.size += 1
+                        LOGGER.info("Pool=%s size was increased to %s for waiting acquire.", self.name, self.size)
+
+            self.in_use += 1
+
+    def _has_permit(self):
+        """Return whether connection may be acquired within pool size."""
+        return self.in_use < self.size and self.in_use + self.dedicated < self.max_size
+
+    async def release(self):
+        """Return acquire permit back to the pool."""
+        async with self._condition:
+            self.in_use -= 1
+            # pool size may have grown since the last release
+            self._condition.notify_all()
+
+    def add_dedicated(self):
+        """Count connection that is held for the whole worker lifetime."""
+        self.dedicated += 1
+
+    async def release_dedicated(self):
+        """Return place of dedicated connection back to the pool."""
+        async with self._condition:
+            self.dedicated -= 1
+            self._condition.notify_all()
+
+    def _record(self, acquire_time):
+        """Record acquire wait time and adapt pool size."""
+        self.acquire_count += 1
+        self.acquire_time_total += acquire_time
+        self.acquire_time_max = max(self.acquire_time_max, acquire_time)
+        self.acquire_time_ewma += POOL_WAIT_EWMA_WEIGHT * (acquire_time - self.acquire_time_ewma)
+        self._peak_in_use = max(self._peak_in_use, self.in_use)
+
+        if self.adaptive:
+            self._adapt()
+
+    def _adapt(self):
+        """Grow or shrink count of permitted connections once per adapt interval."""
+        now = time.monotonic()
+        if now - self._adapted_at < config.POSTGRES_POOL_ADAPT_INTERVAL:
+            return
+
+        grow_wait_time = config.POSTGRES_POOL_GROW_WAIT_MS / 1000
+        underused = self.acquire_time_ewma < grow_wait_time / 10 and self._peak_in_use < self.size
+        if self.acquire_time_ewma > grow_wait_time and self.size < self.max_size:
+            self.size += 1
+            LOGGER.info("Pool=%s size was increased to %s.", self.name, self.size)
+        elif underused and self.size > self.min_size:
+            self.size -= 1
+            LOGGER.info("Pool=%s size was decreased to %s.", self.name, self.size)
+
+        self._adapted_at = now
+        self._peak_in_use = self.in_use
+
+    def as_dict(self):
+        """Return pool telemetry in dictionary format."""
+        acquire_time_avg = self.acquire_time_total / self.acquire_count if self.acquire_count else 0
+        return {
+            "name": self.name,
+            "adaptive": self.adaptive,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self.size,
+            "in_use": self.in_use,
+            "dedicated": self.dedicated,
+            "idle": self._get_idle_size() if self._get_idle_size else None,
+            "waiting": self.waiting,
+            "acquire_count": self.acquire_count,
+            "acquire_avg_ms": round(acquire_time_avg * 1000, 3),
+            "acquire_max_ms": round(self.acquire_time_max * 1000, 3),
+            "acquire_ewma_ms": round(self.acquire_time_ewma * 1000, 3),
+        }
+
+
+class MonitoredPool(Pool):
+    """
+    Class that represents gino asyncpg pool which reports telemetry to pool monitor.
+    Connections acquired while DEDICATED_ACQUIRE is set are counted as dedicated.
+    """
+
+    def __init__(self, url, loop, init=None, **kwargs):
+        """
+        Initialize gino pool and its monitor. Each new connection is initialized
+        by gino connection callback and then hot queries are prepared on it.
+        """
+        async def init_connection(connection):
+            """Initialize new pool connection."""
+            if init is not None:
+                await init(connection)
+
+            await QUERY_REGISTRY.warm(connection)
+
+        super().__init__(url, loop, init=init_connection, **kwargs)
+        self.monitor = PoolMonitor(
+            name=f"{url.host}/{url.database}",
+            min_size=config.POSTGRES_POOL_MIN_SIZE,
+            max_size=config.POSTGRES_POOL_MAX_SIZE,
+            adaptive=config.POSTGRES_POOL_ADAPTIVE,
+            get_idle_size=self.get_idle_size
+        )
+        self._dedicated = set()
+        POOL_MONITORS.append(self.monitor)
+
+    def get_idle_size(self):
+        """Return count of idle connections in asyncpg pool. Pool of asyncpg<0.25 does not report it."""
+        if not hasattr(self.raw_pool, "get_idle_size"):
+            return None
+
+        return self.raw_pool.get_idle_size()
+
+    async def acquire(self, *, timeout=None):
+        """Acquire connection from pool through monitor."""
+        if DEDICATED_ACQUIRE.get():
+            connection = await super().acquire(timeout=timeout)
+            self._dedicated.add(connection)
+            self.monitor.add_dedicated()
+            return connection
+
+        return await self.monitor.acquire(super().acquire, timeout)
+
+    async def release(self, conn):
+        """Release connection to pool and return acquire permit."""
+        dedicated = conn in self._dedicated
+        self._dedicated.discard(conn)
+        try:
+            await super().release(conn)
+        finally:
+            if dedicated:
+                await self.monitor.release_dedicated()
+            else:
+                await self.monitor.release()
+
+    async def close(self):
+        """Close pool and stop its monitoring."""
+        await super().close()
+        POOL_MONITORS.remove(self.monitor)
+
+
+@functools.lru_cache(maxsize=1024)
+def get_query_fingerprint(query):
+    """
+    Return fingerprint and normalized text of provided SQL query. Literals and
+    params are replaced by placeholders, so the same query shape has the same fingerprint.
+    """
+    normalized = query
+    for pattern, placeholder in QUERY_NORMALIZE_PATTERNS:
+        normalized = pattern.sub(placeholder, normalized)
+
+    normalized = normalized.strip()
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()[:16], normalized
+
+
+def get_query_caller():
+    """Return name of the nearest application function (model method) that is executing query."""
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and module != __name__:
+            owner = frame.f_locals.get("cls") or getattr(frame.f_locals.get("self"), "__class__", None)
+            if owner is not None:
+                return f"{module}.{owner.__name__}.{frame.f_code.co_name}"
+
+            return f"{module}.{frame.f_code.co_name}"
+
+        frame = frame.f_back
+
+    return None
+
+
+class QueryStats:
+    """
+    Class that collects execution time of database queries grouped by
+    normalized query fingerprint and logs queries slower than threshold.
+    """
+
+    def __init__(self, slow_threshold, max_size):
+        """Initialize empty stats with slow query threshold in seconds and max count of fingerprints."""
+        self.slow_threshold = slow_threshold
+        self.max_size = max_size
+        self.dropped_count = 0
+        self._stats = {}
+
+    def record(self, query, duration):
+        """Record query execution duration in seconds and log it in case query is slow."""
+        fingerprint, normalized = get_query_fingerprint(query)
+        stats = self._stats.get(fingerprint)
+        if stats is None:
+            if len(self._stats) >= self.max_size:
+                self.dropped_count += 1
+                return
+
+            stats = self._stats[fingerprint] = {
+                "fingerprint": fingerprint,
+                "query": normalized,
+                "count": 0,
+                "total_time": 0,
+                "max_time": 0,
+                "slow_count": 0,
+                "slow_caller": None,
+            }
+
+        stats["count"] += 1
+        stats["total_time"] += duration
+        stats["max_time"] = max(stats["max_time"], duration)
+
+        if duration >= self.slow_threshold:
+            caller = get_query_caller()
+            stats["slow_count"] += 1
+            stats["slow_caller"] = caller
+            LOGGER.warning(
+                "Slow query fingerprint=%s took %.3fms in %s: %s",
+                fingerprint, duration * 1000, caller, normalized
+            )
+
+    def top(self, limit, order_by="total_time"):
+        """Return limited list of query stats with the highest provided order field."""
+        stats = sorted(self._stats.values(), key=lambda item: item[order_by], reverse=True)[:limit]
+        return [
+            {
+                "fingerprint": item["fingerprint"],
+                "query": item["query"],
+                "count": item["count"],
+                "total_ms": round(item["total_time"] * 1000, 3),
+                "avg_ms": round(item["total_time"] / item["count"] * 1000, 3),
+                "max_ms": round(item["max_time"] * 1000, 3),
+                "slow_count": item["slow_count"],
+                "slow_caller": item["slow_caller"],
+            }
+            for item in stats
+        ]
+
+    def reset(self):
+        """Remove all collected stats."""
+        self.dropped_count = 0
+        self._stats = {}
+
+
+class MonitoredConnection(Connection):
+    """
+    Class that represents asyncpg connection which reports execution time of queries.
+    Both gino and compiled queries are executed through the same asyncpg internal method.
+    """
+
+    async def _do_execute(self, query, executor, timeout, retry=True, *, ignore_custom_codec=False, record_class=None):
+        """Execute query recording its duration to query stats."""
+        kwargs = {"ignore_custom_codec": ignore_custom_codec, "record_class": record_class}
+        if not config.POSTGRES_QUERY_STATS_ENABLED:
+            return await super()._do_execute(query, executor, timeout, retry, **kwargs)
+
+        started = time.monotonic()
+        try:
+            return await super()._do_execute(query, executor, timeout, retry, **kwargs)
+        finally:
+            QUERY_STATS.record(query, time.monotonic() - started)
+
+
+class ReplicaRouter:
+    """
+    Class that routes read-only queries to replica database.
+    Queries are executed on primary database in case replica
+    is not configured or not available.
+    """
+
+    def __init__(self):
+        """Initialize router without replica engine."""
+        self.engine = None
+
+    async def connect(self, dsn, **kwargs):
+        """Create replica engine by provided dsn and pool arguments."""
+        self.engine = await gino.create_engine(dsn, **kwargs)
+
+    async def disconnect(self):
+        """Close replica engine pool."""
+        if self.engine is not None:
+            await self.engine.close()
+            self.engine = None
+
+    async def run(self, operation):
+        """Run coroutine function that accepts bind on replica with fallback to primary."""
+        if self.engine is not None:
+            try:
+                return await operation(self.engine)
+            except REPLICA_FALLBACK_ERRORS as err:
+                LOGGER.warning("Replica query failed, falling back to primary. Error: %s", err)
+
+        return await operation(db)
+
+    async def all(self, clause, **params):
+        """Execute read-only query and return all rows."""
+        return await self.run(lambda bind: bind.all(clause, **params))
+
+    async def first(self, clause, **params):
+        """Execute read-only query and return first row."""
+        return await self.run(lambda bind: bind.first(clause, **params))
+
+
+class ShardRouter:
+    """
+    Class that routes user`s data queries to database shard that owns the user.
+    Users are mapped to shards by consistent hashing of user id, so appending
+    a new shard remaps only part of users. Queries are executed on primary
+    database (or replica for read-only ones) in case shards are not configured
+    or user was created before sharding was enabled.
+    """
+
+    def __init__(self):
+        """Initialize router without shard engines."""
+        self.engines = []
+        self._ring = []
+        self._ring_keys = []
+
+    @staticmethod
+    def _hash(key):
+        """Return stable integer hash of provided key."""
+        return int(hashlib.md5(key.encode("utf-8")).hexdigest()[:16], 16)
+
+    async def connect(self, dsns, **kwargs):
+        """Create shard engines by provided dsns and pool arguments and build hash ring."""
+        for index, dsn in enumerate(dsns):
+            self.engines.append(await gino.create_engine(dsn, **kwargs))
+            # ring node keys depend on shard position, so new shards must be appended to the end
+            for vnode in range(config.POSTGRES_SHARD_VIRTUAL_NODES):
+                self._ring.append((self._hash(f"shard-{index}-{vnode}"), index))
+
+        self._ring.sort()
+        self._ring_keys = [key for key, _ in self._ring]
+
+    async def disconnect(self):
+        """Close shard engines pools."""
+        for engine in self.engines:
+            await engine.close()
+
+        self.engines, self._ring, self._ring_keys = [], [], []
+
+    @property
+    def binds(self):
+        """Return all databases that store users data."""
+        if not self.engines:
+            return [db]
+
+        if config.POSTGRES_SHARD_START_USER_ID > 1:
+            return [db, *self.engines]
+
+        return self.engines
+
+    def get_bind(self, user_id):
+        """
+        Return shard engine that owns provided user or None in case sharding is not configured
+        or user is stored on primary database.
+        """
+        if not self.engines or user_id is None or int(user_id) < config.POSTGRES_SHARD_START_USER_ID:
+            return None
+
+        position = bisect.bisect(self._ring_keys, self._hash(str(user_id))) % len(self._ring)
+        _, index = self._ring[position]
+        return self.engines[index]
+
+    async def run(self, user_id, operation, read_only=False):
+        """Run coroutine function that accepts bind on shard that owns provided user."""
+        bind = self.get_bind(user_id)
+        if bind is not None:
+            return await operation(bind)
+
+        if read_only:
+            return await replica.run(operation)
+
+        return await operation(db)
+
+    async def all(self, user_id, clause, read_only=False, **params):
+        """Execute query on user`s shard and return all rows."""
+        return await self.run(user_id, lambda bind: bind.all(clause, **params), read_only)
+
+    async def first(self, user_id, clause, read_only=False, **params):
+        """Execute query on user`s shard and return first row."""
+        return await self.run(user_id, lambda bind: bind.first(clause, **params), read_only)
+
+    async def scalar(self, user_id, clause, **params):
+        """Execute query on user`s shard and return first column of first row."""
+        return await self.run(user_id, lambda bind: bind.scalar(clause, **params))
+
+    async def status(self, user_id, clause, **params):
+        """Execute query on user`s shard and return its status."""
+        return await self.run(user_id, lambda bind: bind.status(clause, **params))
+
+    async def scatter_first(self, clause, **params):
+        """Execute query on each shard one by one and return the first found row."""
+        for bind in self.binds:
+            row = await bind.first(clause, **params)
+            if row is not None:
+                return row
+
+        return None
+
+
+class CompiledQuery:
+    """
+    Class that represents hot query shape that is compiled to SQL only once.
+    Compiled query is executed directly on asyncpg connection, so asyncpg
+    reuses prepared statement from its per connection statement cache.
+    """
+
+    # the same way gino engine creates its dialect, so SQL uses asyncpg numeric params
+    dialect = AsyncpgDialect(dbapi=AsyncpgDialect.dbapi())
+
+    def __init__(self, name, build, read_only=False, sample_params=None):
+        """
+        Initialize query by name and function that builds sqlalchemy clause with bind params.
+        Read-only queries are routed to replica database. Sample params are used
+        instead of NULL on warming, so expressions over them are evaluated too.
+        """
+        self.name = name
+        self.build = build
+        self.read_only = read_only
+        self.sample_params = sample_params or {}
+        self._clause = None
+        self._sql = None
+        self._positions = None
+        self._defaults = None
+
+    @property
+    def clause(self):
+        """Return sqlalchemy clause of the query."""
+        if self._clause is None:
+            self._clause = self.build()
+
+        return self._clause
+
+    def _compile(self):
+        """Compile query clause to SQL with positional params in case it is not compiled yet."""
+        if self._sql is not None:
+            return
+
+        compiled = self.clause.compile(dialect=self.dialect)
+        self._sql = compiled.string
+        self._positions = compiled.positiontup
+        self._defaults = compiled.params
+
+    @property
+    def sql(self):
+        """Return compiled SQL of the query."""
+        self._compile()
+        return self._sql
+
+    def get_args(self, params):
+        """Return positional arguments for compiled SQL from provided bind params."""
+        self._compile()
+        return [params[name] if name in params else self._defaults[name] for name in self._positions]
+
+    async def _execute(self, bind, method, params):
+        """Execute query on provided bind by gino method name (all, first)."""
+        if not config.POSTGRES_COMPILED_QUERIES_ENABLED:
+            return await getattr(bind, method)(self.clause, **params)
+
+        args = self.get_args(params)
+        async with bind.acquire(reuse=True) as conn:
+            if method == "first":
+                return await conn.raw_connection.fetchrow(self.sql, *args)
+
+            return await conn.raw_connection.fetch(self.sql, *args)
+
+    async def _run(self, method, params):
+        """Execute query on shard of user from params, read-only queries are routed to replica."""
+        operation = functools.partial(self._execute, method=method, params=params)
+        return await shards.run(params.get("user_id"), operation, self.read_only)
+
+    async def all(self, **params):
+        """Execute query and return all rows."""
+        return await self._run("all", params)
+
+    async def first(self, **params):
+        """Execute query and return first row."""
+        return await self._run("first", params)
+
+    async def warm(self, connection):
+        """
+        Prepare query on provided asyncpg connection. The query is executed
+        with sample params and NULL for the rest, so it matches no rows and
+        prepared statement gets into connection statement cache.
+        """
+        await connection.fetch(self.sql, *self.get_args(self.sample_params))
+
+
+class QueryRegistry:
+    """Class that represents registry of hot compiled queries."""
+
+    def __init__(self):
+        """Initialize empty registry."""
+        self._queries = {}
+
+    def register(self, name, build, read_only=False, sample_params=None):
+        """Register query shape by name and function that builds sqlalchemy clause."""
+        query = CompiledQuery(name, build, read_only, sample_params)
+        self._queries[name] = query
+        return query
+
+    def get(self, name):
+        """Return registered query by name."""
+        return self._queries[name]
+
+    def __iter__(self):
+        """Iterate over registered queries."""
+        return iter(self._queries.values())
+
+    async def warm(self, connection):
+        """Prepare all registered queries on a new pool connection."""
+        if not config.POSTGRES_COMPILED_QUERIES_ENABLED:
+            return
+
+        for query in self._queries.values():
+            try:
+                await query.warm(connection)
+            except exceptions.PostgresError as err:
+                LOGGER.error("Could not prepare query=%s. Error: %s", query.name, err)
+
+
+QUERY_STATS = QueryStats(config.POSTGRES_SLOW_QUERY_MS / 1000, config.POSTGRES_QUERY_STATS_SIZE)
+replica = ReplicaRouter()
+shards = ShardRouter()
+QUERY_REGISTRY = QueryRegistry()
@@ -1,19 +1,32 @@
 """This module provides server app initialization."""
 
 import os
+import asyncio
 import logging
 
 import jinja2
+import aioredis
 import aiohttp_jinja2
 import requests
 from aiogram.dispatcher import webhook
+from asyncpg import exceptions
 from aiohttp.web import Application
 from aiojobs.aiohttp import setup as aiojobs_setup
 from aiohttp_swagger import setup_swagger
 
 from app import config
-from app.db import db, get_database_dsn
+from app.cache import (
+    CACHE_INVALIDATION_CHANNEL, CACHE_INVALIDATION_HEALTH_CHECK_INTERVAL, CACHE_INVALIDATION_RECONNECT_INTERVAL,
+    LOCAL_CACHE_INVALIDATION_CHANNEL, handle_invalidation_notification, invalidate_notified_cache,
+    listen_local_cache_invalidation, local_cache
+)
+from app.db import (
+    db, replica, shards, get_database_dsn, MonitoredPool, MonitoredConnection, DEDICATED_ACQUIRE,
+    REPLICA_FALLBACK_ERRORS
+)
+from app.models.transaction import Transaction
 from app.telegram import TELEGRAM_BOT, TELEGRAM_DISPATCHER
+from app.utils.errors import DatabaseError
 from app.middlewares import auth_middleware, body_validator_middleware, error_middleware
 from app.api.index import internal_routes
 from app.api.budget import budget_routes
@@ -27,6 +40,9 @@ from app.api.index import handle_404, handle_405, handle_500
 
 LOGGER = logging.getLogger(__name__)
 LOG_FORMAT = "%(asctime)s - %(levelname)s: %(name)s: %(message)s"
+CACHE_INVALIDATION_ERRORS = (
+    OSError, asyncio.TimeoutError, exceptions.PostgresError, exceptions.InterfaceError, aioredis.RedisError
+)
 
 
 async def init_config(app):
@@ -69,14 +85,175 @@ def init_db(app):
         app,
         dict(
             dsn=get_database_dsn(),
-            min_size=config.POSTGRES_POOL_MIN_SIZE,
-            max_size=config.POSTGRES_POOL_MAX_SIZE,
+            pool_min_size=config.POSTGRES_POOL_MIN_SIZE,
+            pool_max_size=config.POSTGRES_POOL_MAX_SIZE,
             retry_limit=config.POSTGRES_RETRY_LIMIT,
-            retry_interval=config.POSTGRES_RETRY_INTERVAL
+            retry_interval=config.POSTGRES_RETRY_INTERVAL,
+            kwargs=dict(pool_class=MonitoredPool, connection_class=MonitoredConnection)
         ),
     )
 
 
+async def init_replica_db(_app):
+    """Initialize read-only replica database connection in case replica is configured."""
+    if config.POSTGRES_REPLICA_DSN:
+        try:
+            await replica.connect(
+                config.POSTGRES_REPLICA_DSN,
+                min_size=config.POSTGRES_POOL_MIN_SIZE,
+                max_size=config.POSTGRES_POOL_MAX_SIZE,
+                pool_class=MonitoredPool,
+                connection_class=MonitoredConnection
+            )
+            LOGGER.debug("Replica database connection has successfully set up.")
+        except REPLICA_FALLBACK_ERRORS as err:
+            LOGGER.error("Could not connect to replica database, primary will be used. Error: %s", err)
+
+    yield
+
+    await replica.disconnect()
+
+
+async def init_shards_db(_app):
+    """Initialize connections to databases shards in case sharding is configured."""
+    if config.POSTGRES_SHARD_DSNS:
+        await shards.connect(
+            config.POSTGRES_SHARD_DSNS,
+            min_size=config.POSTGRES_POOL_MIN_SIZE,
+            max_size=config.POSTGRES_POOL_MAX_SIZE,
+            pool_class=MonitoredPool,
+            connection_class=MonitoredConnection
+        )
+        LOGGER.debug("Shards database connections have successfully set up.")
+
+    yield
+
+    await shards.disconnect()
+
+
+async def listen_cache_invalidation(bind):
+    """
+    Listen to database change notifications on connection to provided database.
+    Connection is health-checked and reacquired in case it is lost. Notifications
+    may have been missed meanwhile, so all notified cache is invalidated on reconnect.
+    """
+    # listening connection is held by this task only, so it is not counted in pool sizing
+    DEDICATED_ACQUIRE.set(True)
+    reconnect = False
+    while True:
+        try:
+            async with bind.acquire(lazy=False) as connection:
+                raw_connection = connection.raw_connection
+                terminated = asyncio.Event()
+
+                def handle_termination(_connection):
+                    """Wake up listener in case connection is closed."""
+                    terminated.set()
+
+                raw_connection.add_termination_listener(handle_termination)
+                try:
+                    await raw_connection.add_listener(CACHE_INVALIDATION_CHANNEL, handle_invalidation_notification)
+                    if reconnect:
+                        await invalidate_notified_cache()
+                        LOGGER.warning("Cache invalidation listener has reconnected, notified cache was invalidated.")
+
+                    reconnect = True
+                    while not terminated.is_set():
+                        try:
+                            await asyncio.wait_for(terminated.wait(), CACHE_INVALIDATION_HEALTH_CHECK_INTERVAL)
+                        except asyncio.TimeoutError:
+                            await raw_connection.fetchval("SELECT 1", timeout=CACHE_INVALIDATION_HEALTH_CHECK_INTERVAL)
+                finally:
+                    raw_connection.remove_termination_listener(handle_termination)
+                    if not raw_connection.is_closed():
+                        await raw_connection.remove_listener(
+                            CACHE_INVALIDATION_CHANNEL, handle_invalidation_notification
+                        )
+
+            LOGGER.error("Cache invalidation listening connection was closed.")
+        except CACHE_INVALIDATION_ERRORS as err:
+            LOGGER.error("Cache invalidation listening connection failed. Error: %s", err)
+
+        reconnect = True
+        await asyncio.sleep(CACHE_INVALIDATION_RECONNECT_INTERVAL)
+
+
+async def init_cache_invalidation(app):
+    """
+    Listen to database change notifications in order to invalidate affected cache keys.
+    Each worker holds own listening connection to primary database and each shard.
+    """
+    app["cache_invalidation_listeners"] = [
+        asyncio.ensure_future(listen_cache_invalidation(bind)) for bind in dict.fromkeys([db, *shards.binds])
+    ]
+    LOGGER.debug("Cache invalidation listener has successfully set up.")
+
+
+async def close_cache_invalidation(app):
+    """Stop listening to database change notifications and release listening connections."""
+    listeners = app.get("cache_invalidation_listeners", [])
+    for listener in listeners:
+        listener.cancel()
+
+    await asyncio.gather(*listeners, return_exceptions=True)
+
+
+async def listen_redis_cache_invalidation():
+    """
+    Listen to redis invalidation channel in order to remove keys deleted by other workers
+    from local cache. Connection is reestablished in case it is lost. Messages may have
+    been missed meanwhile, so local cache is cleared on reconnect.
+    """
+    reconnect = False
+    while True:
+        redis = None
+        try:
+            redis = await aioredis.create_redis(config.REDIS_URL)
+            channel, = await redis.subscribe(LOCAL_CACHE_INVALIDATION_CHANNEL)
+            if reconnect:
+                local_cache.clear()
+                LOGGER.warning("Local cache invalidation listener has reconnected, local cache was cleared.")
+
+            reconnect = True
+            await listen_local_cache_invalidation(channel)
+            LOGGER.error("Local cache invalidation channel was closed.")
+        except CACHE_INVALIDATION_ERRORS as err:
+            LOGGER.error("Local cache invalidation listening connection failed. Error: %s", err)
+        finally:
+            if redis is not None:
+                redis.close()
+                await redis.wait_closed()
+
+        reconnect = True
+        await asyncio.sleep(CACHE_INVALIDATION_RECONNECT_INTERVAL)
+
+
+async def init_local_cache_invalidation(_app):
+    """
+    Listen to redis invalidation channel in background, so application starts
+    even if redis is unavailable. Local cache expiration bounds staleness
+    in case some message is lost.
+    """
+    listener = asyncio.ensure_future(listen_redis_cache_invalidation())
+    LOGGER.debug("Local cache invalidation listener has successfully set up.")
+
+    yield
+
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+
+
+async def init_transaction_partitions(_app):
+    """Ensure transaction table partitions exist for current and upcoming months."""
+    try:
+        await Transaction.create_partitions(config.POSTGRES_TRANSACTION_PARTITIONS_AHEAD)
+    except DatabaseError as err:
+        LOGGER.error("Transaction partitions were not created. Error: %s", err)
+        return
+
+    LOGGER.debug("Transaction partitions have successfully set up.")
+
+
 async def init_telegram_webhook(app):
     """Initialize telegram bot webhook."""
     telegram_webhook = await TELEGRAM_BOT.get_webhook_info()
@@ -126,6 +303,13 @@ def init_app():
     TELEGRAM_DISPATCHER.register_message_handler(handle_stop, commands=["stop"])
 
     app.on_startup.append(init_config)
+    app.on_startup.append(init_transaction_partitions)
+    app.cleanup_ctx.append(init_replica_db)
+    app.cleanup_ctx.append(init_shards_db)
+    # database connections are closed on cleanup, so listener is stopped on shutdown
+    app.on_startup.append(init_cache_invalidation)
+    app.on_shutdown.append(close_cache_invalidation)
+    app.cleanup_ctx.append(init_local_cache_invalidation)
 
     if config.SERVER_MODE != "DEV":
         app.cleanup_ctx.append(init_telegram_webhook)
@@ -1,5 +1,6 @@
 """This module provides middlewares for server application."""
 
+import hmac
 import json
 from http import HTTPStatus
 
@@ -20,6 +21,9 @@ SAFE_ROUTES = (
     "/v1/auth/reset_password",
     "/v1/auth/change_email/confirm"
 )
+INTERNAL_ROUTES = (
+    "/v1/internal",
+)
 
 
 def error_middleware(error_handlers):
@@ -49,6 +53,9 @@ async def auth_middleware(request, handler):
     if request.path.startswith(SAFE_ROUTES):
         return await handler(request)
 
+    if request.path.startswith(INTERNAL_ROUTES):
+        return await internal_auth(request, handler)
+
     token = request.headers.get("Authorization")
     if not token:
         return make_response(
@@ -72,6 +79,20 @@ async def auth_middleware(request, handler):
     return await handler(request)
 
 
+async def internal_auth(request, handler):
+    """Check if internal token in headers is correct. Internal routes are disabled if token is not configured."""
+    internal_token = request.app.config.INTERNAL_API_TOKEN
+    token = request.headers.get("X-Internal-Token", "")
+    if not internal_token or not hmac.compare_digest(token.encode(), internal_token.encode()):
+        return make_response(
+            success=False,
+            message="You don't have permission to access internal routes.",
+            http_status=HTTPStatus.FORBIDDEN
+        )
+
+    return await handler(request)
+
+
 @web.middleware
 async def body_validator_middleware(request, handler):
     """Check if provided body data for mutation methods is correct."""
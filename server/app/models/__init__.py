@@ -1,8 +1,12 @@
 """This module provides functionality for database interactions."""
 
+import itertools
 from decimal import Decimal
 from datetime import datetime
 
+from sqlalchemy import Text, func, cast, select, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
 from app.utils.time import DATETIME_FORMAT
 
 
@@ -38,3 +42,35 @@ def parse_status(status):
         return bool(int(status_count))
 
     return False
+
+
+def build_owned_mutation(table, entity_id, user_id, mutation):
+    """
+    Return single statement query that applies update or delete mutation to entity
+    by id only in case it belongs to provided user. Query returns no rows if entity
+    does not exist and NULL mutated_id if entity belongs to another user.
+    """
+    target = select([table.c.id, table.c.user_id]).where(table.c.id == entity_id).cte("target")
+    mutated = mutation \
+        .where((table.c.id == entity_id) & (table.c.user_id == user_id)) \
+        .returning(table.c.id) \
+        .cte("mutated")
+
+    return select([target.c.user_id, mutated.c.id.label("mutated_id")]) \
+        .select_from(target.outerjoin(mutated, target.c.id == mutated.c.id))
+
+
+def build_json_array(fields, order_by, where=None):
+    """
+    Return aggregate expression that builds JSON array of objects in database.
+    Objects are built from fields mapping (key -> column) and ordered by provided columns.
+    The array is cast to text, otherwise gino decodes JSON result to python objects.
+    """
+    json_object = func.json_build_object(*itertools.chain.from_iterable(
+        (literal_column(f"'{key}'"), column) for key, column in fields.items()
+    ))
+    json_array = func.json_agg(aggregate_order_by(json_object, *order_by))
+    if where is not None:
+        json_array = json_array.filter(where)
+
+    return cast(func.coalesce(json_array, literal_column("'[]'::json")), Text)
@@ -2,10 +2,11 @@
 
 import logging
 
+from sqlalchemy import bindparam
 from sqlalchemy.orm import relationship
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.db import db
+from app.db import db, shards, QUERY_REGISTRY
 from app.models import BaseModelMixin, parse_status
 from app.utils.errors import DatabaseError
 
@@ -17,7 +18,7 @@ class Budget(db.Model, BaseModelMixin):
     __tablename__ = "budget"
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    income = db.Column(db.Numeric(12, 2), nullable=False, default=0.0)
+    income = db.Column(db.BigInteger, nullable=False, default=0)
     savings = db.Column(db.SmallInteger, nullable=False, default=0)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
 
@@ -29,23 +30,21 @@ class Budget(db.Model, BaseModelMixin):
     async def get_budget(cls, user_id):
         """Retrieve queried budget from database by provided user_id."""
         try:
-            budget = await cls.query \
-                .where(cls.user_id == user_id) \
-                .gino.first()
+            budget = await QUERY_REGISTRY.get("budget.get_budget").first(user_id=user_id)
         except SQLAlchemyError as err:
             LOGGER.error("Could not retrieve budget for user=%s. Error: %s", user_id, err)
             raise DatabaseError("Failed to retrieve budget for requested user.")
 
-        return budget
+        return cls(**dict(budget)) if budget else None
 
     @classmethod
     async def update_budget(cls, user_id, savings, income):
         """Update profile budget in database for provided user."""
         try:
-            status, _ = await cls.update \
-                .values(savings=savings, income=income)\
-                .where(cls.user_id == user_id) \
-                .gino.status()
+            status, _ = await shards.status(
+                user_id,
+                cls.update.values(savings=savings, income=income).where(cls.user_id == user_id)
+            )
         except SQLAlchemyError as err:
             LOGGER.error("Could not update budget for user=%s. Error: %s", user_id, err)
             raise DatabaseError("Failed to update budget for requested user.")
@@ -53,3 +52,11 @@ class Budget(db.Model, BaseModelMixin):
         updated = parse_status(status)
         if not updated:
             raise DatabaseError("The requested user`s budget was not updated.")
+
+
+def _build_budget_query():
+    """Return query of budget by user."""
+    return db.select(Budget.__table__.columns).where(Budget.user_id == bindparam("user_id"))
+
+
+QUERY_REGISTRY.register("budget.get_budget", _build_budget_query)
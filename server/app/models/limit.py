@@ -3,14 +3,14 @@
 import logging
 
 from asyncpg import exceptions
-from sqlalchemy import cast
+from sqlalchemy import bindparam
 from sqlalchemy.orm import relationship
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.db import db
-from app.models import BaseModelMixin, parse_status
+from app.db import db, shards, QUERY_REGISTRY
+from app.models import BaseModelMixin, build_owned_mutation
 from app.models.mcc import MCCCategory
-from app.utils.errors import DatabaseError, DBNoResultFoundError
+from app.utils.errors import DatabaseError, DBNoResultFoundError, DBPermissionDeniedError
 
 LOGGER = logging.getLogger(__name__)
 
@@ -23,7 +23,7 @@ class Limit(db.Model, BaseModelMixin):
     )
 
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey("mcc_category.id"), nullable=False)
 
@@ -31,35 +31,11 @@ class Limit(db.Model, BaseModelMixin):
 
     _limit_user_idx = db.Index("limit_user_idx", "user_id")
 
-    @classmethod
-    async def get_by_id(cls, limit_id):
-        """Return queried budget limit by provided id."""
-        try:
-            limit = await super().get(limit_id)
-        except SQLAlchemyError as err:
-            LOGGER.error("Could not retrieve budget limit by id=%s. Error: %s", limit_id, err)
-            raise DatabaseError("Failed to retrieve requested budget limit.")
-
-        if not limit:
-            raise DBNoResultFoundError("The requested budget limit does not exist.")
-
-        return limit
-
     @classmethod
     async def get_user_limits(cls, user_id):
         """Return queried user`s budget limits."""
         try:
-            limits = await db \
-                .select([
-                    cls.id,
-                    cast(cls.amount, db.String).label("balance"),
-                    MCCCategory.name,
-                    MCCCategory.info,
-                ]) \
-                .select_from(cls.join(MCCCategory)) \
-                .where(cls.user_id == user_id) \
-                .gino.all()
-
+            limits = await QUERY_REGISTRY.get("limit.get_user_limits").all(user_id=user_id)
         except SQLAlchemyError as err:
             LOGGER.error("Could not retrieve budget limits for user=%s. Error: %s", user_id, err)
             raise DatabaseError("Failed to retrieve budget limits for requested user.")
@@ -70,7 +46,12 @@ class Limit(db.Model, BaseModelMixin):
     async def create(cls, user_id, category_id, amount):
         """Create a new budget limit in database."""
         try:
-            return await super().create(user_id=user_id, category_id=category_id, amount=amount)
+            return await super().create(
+                bind=shards.get_bind(user_id),
+                user_id=user_id,
+                category_id=category_id,
+                amount=amount
+            )
         except exceptions.UniqueViolationError:
             raise DatabaseError("A limit with such category for requested user already exists.")
         except SQLAlchemyError as err:
@@ -78,30 +59,51 @@ class Limit(db.Model, BaseModelMixin):
             raise DatabaseError("Failed to create limit budget for requested user.")
 
     @classmethod
-    async def update(cls, limit_id, amount):
-        """Update budget limit instance in database."""
+    async def _mutate_owned(cls, user_id, limit_id, mutation):
+        """Apply mutation to user`s budget limit. Return False if limit belongs to another user."""
+        query = build_owned_mutation(cls.__table__, limit_id, user_id, mutation)
+        result = await shards.first(user_id, query)
+        if not result:
+            raise DBNoResultFoundError("The requested budget limit does not exist.")
+
+        return result["mutated_id"] is not None
+
+    @classmethod
+    async def update(cls, user_id, limit_id, amount):
+        """Update user`s budget limit instance in database."""
         try:
-            status, _ = await super().update \
-                .values(amount=amount) \
-                .where(cls.id == limit_id) \
-                .gino.status()
+            updated = await cls._mutate_owned(user_id, limit_id, cls.__table__.update().values(amount=amount))
         except SQLAlchemyError as err:
             LOGGER.error("Could not update budget limit=%s. Error: %s", limit_id, err)
             raise DatabaseError("Failed to update budget limit.")
 
-        updated = parse_status(status)
         if not updated:
-            raise DatabaseError("The budget limit was not updated.")
+            raise DBPermissionDeniedError("You don't have permission to edit this limit.")
 
     @classmethod
-    async def delete(cls, limit_id):
-        """Delete budget limit by provided id."""
+    async def delete(cls, user_id, limit_id):
+        """Delete user`s budget limit by provided id."""
         try:
-            status, _ = await super().delete.where(cls.id == limit_id).gino.status()
+            deleted = await cls._mutate_owned(user_id, limit_id, cls.__table__.delete())
         except SQLAlchemyError as err:
             LOGGER.error("Could not delete budget limit by id=%s. Error: %s", limit_id, err)
             raise DatabaseError("Failed to delete budget limit.")
 
-        deleted = parse_status(status)
         if not deleted:
-            raise DatabaseError("The budget category limit was not deleted.")
+            raise DBPermissionDeniedError("You don't have permission to delete this limit.")
+
+
+def _build_user_limits_query():
+    """Return query of user`s budget limits with categories."""
+    return db \
+        .select([
+            Limit.id,
+            Limit.amount.label("balance"),
+            MCCCategory.name,
+            MCCCategory.info,
+        ]) \
+        .select_from(Limit.join(MCCCategory)) \
+        .where(Limit.user_id == bindparam("user_id"))
+
+
+QUERY_REGISTRY.register("limit.get_user_limits", _build_user_limits_query, read_only=True)
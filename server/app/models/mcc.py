@@ -5,8 +5,8 @@ import logging
 from sqlalchemy.orm import relationship
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.db import db
-from app.cache import cache, MCC_CODES_CACHE_KEY, MCC_CATEGORIES_CACHE_KEY
+from app.db import db, replica
+from app.cache import get_or_compute, MCC_CODES_CACHE_KEY, MCC_CATEGORIES_CACHE_KEY
 from app.models import BaseModelMixin
 from app.utils.errors import DatabaseError, DBNoResultFoundError
 
@@ -25,19 +25,17 @@ class MCC(db.Model, BaseModelMixin):
 
     @classmethod
     async def get_codes(cls):
-        """Retrieve all MCC codes."""
-        mcc_codes = await cache.get(MCC_CODES_CACHE_KEY)
-        if mcc_codes:
-            return mcc_codes
+        """Retrieve all MCC codes from cache or database."""
+        return await get_or_compute(MCC_CODES_CACHE_KEY, cls._get_codes)
+
+    @classmethod
+    async def _get_codes(cls):
+        """Retrieve all MCC codes from database."""
         try:
-            mcc_codes = [mcc.code for mcc in await cls.query.gino.all()]
+            return [mcc.code for mcc in await replica.all(cls.query)]
         except SQLAlchemyError as err:
             LOGGER.error("Couldn't retrieve all MCC codes. Error: %s", err)
             raise DatabaseError("Failed to retrieve MCC codes.")
-        else:
-            await cache.set(MCC_CODES_CACHE_KEY, mcc_codes)
-
-        return mcc_codes
 
 
 class MCCCategory(db.Model, BaseModelMixin):
@@ -52,18 +50,17 @@ class MCCCategory(db.Model, BaseModelMixin):
 
     @classmethod
     async def get_names(cls):
-        """Retrieve all MCC categories."""
-        mcc_categories = await cache.get(MCC_CATEGORIES_CACHE_KEY)
-        if mcc_categories:
-            return mcc_categories
+        """Retrieve all MCC categories from cache or database."""
+        return await get_or_compute(MCC_CATEGORIES_CACHE_KEY, cls._get_names)
+
+    @classmethod
+    async def _get_names(cls):
+        """Retrieve all MCC categories from database."""
         try:
-            mcc_categories = [category.as_dict() for category in await cls.query.gino.all()]
+            return [category.as_dict() for category in await cls.query.gino.all()]
         except SQLAlchemyError as err:
             LOGGER.error("Could not retrieve all MCC categories. Error: %s", err)
             raise DatabaseError("Failed to retrieve MCC categories.")
-        else:
-            await cache.set(MCC_CATEGORIES_CACHE_KEY, mcc_categories)
-        return mcc_categories
 
     @classmethod
     async def get_by_name(cls, name):
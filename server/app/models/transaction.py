@@ -1,118 +1,472 @@
 """This module provides functionality to interact with transactions in database."""
 
 import logging
+import operator
+import functools
+import itertools
 from datetime import datetime
 
 from asyncpg import exceptions
-from sqlalchemy import between, extract, func, cast, and_
+from sqlalchemy import between, func, cast, and_, tuple_, literal_column, union_all, bindparam
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.db import db
-from app.models import BaseModelMixin
+from app import config
+from app.db import db, shards, QUERY_REGISTRY
+from app.models import BaseModelMixin, build_json_array
 from app.models.mcc import MCC, MCCCategory
-from app.cache import cache, MONTH_REPORT_CACHE_EXPIRE, MONTH_REPORT_CACHE_KEY
+from app.cache import (
+    get_or_compute, get_generation, MONTH_REPORT_CACHE_EXPIRE, MONTH_REPORT_CACHE_KEY, TRANSACTIONS_GENERATION
+)
 from app.utils.errors import DatabaseError
+from app.utils.money import format_amount_column
+from app.utils.pagination import encode_cursor, encode_change_token
+from app.utils.time import get_month_start
 
 
 LOGGER = logging.getLogger(__name__)
+# asyncpg allows at most 32767 bind params per statement
+BULK_INSERT_CHUNK_SIZE = 1000
+TIMESERIES_INTERVALS = ("hour", "day", "week", "month")
+# bounds generated series of timeseries endpoint, so a long period can not be requested with a short interval
+TIMESERIES_MAX_BUCKETS = {
+    "hour": 24 * 31,
+    "day": 366,
+    "week": 53 * 2,
+    "month": 12 * 10,
+}
+TIMESERIES_DATE_FORMAT = "YYYY.MM.DD"
+TIMESERIES_DATETIME_FORMAT = "YYYY.MM.DD HH24:MI:SS"
+TRANSACTIONS_QUERY_NAME = "transaction.get_transactions-{category}-{cursor}-{archive}"
+TRANSACTIONS_JSON_QUERY_NAME = "transaction.get_transactions_json-{category}-{cursor}-{archive}"
+SEARCH_QUERY_NAME = "transaction.search_transactions-{cursor}"
+SEARCH_MIN_LENGTH = 3
+# postgres accepts only single character escape, backslash would be doubled in SQL literal
+SEARCH_ESCAPE = "!"
+CHANGES_QUERY_NAME = "transaction.get_changes-{archive}"
 
 
 class Transaction(db.Model, BaseModelMixin):
     """Class that represents Transaction in system."""
     __tablename__ = "transaction"
+    __table_args__ = (
+        # unique constraints of partitioned table must include partition key
+        db.UniqueConstraint("user_id", "external_id", "timestamp", name="transaction_user_external_id_key"),
+    )
 
-    id = db.Column(db.String(255), primary_key=True)
+    id = db.Column(db.BigInteger, primary_key=True, server_default=db.text("nextval('transaction_id_seq')"))
+    external_id = db.Column(db.String(255), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
-    amount = db.Column(db.Numeric(12, 2), nullable=False)
-    balance = db.Column(db.Numeric(12, 2))
-    cashback = db.Column(db.Numeric(12, 2), default=0)
+    amount = db.Column(db.BigInteger, nullable=False)
+    balance = db.Column(db.BigInteger)
+    cashback = db.Column(db.BigInteger, default=0)
     mcc = db.Column(db.Integer, db.ForeignKey("mcc.code"))
-    timestamp = db.Column(db.DateTime, nullable=False)
+    # table is partitioned by month of timestamp, so it is part of primary key
+    timestamp = db.Column(db.DateTime, primary_key=True)
     info = db.Column(db.String(255), nullable=False, default="")
+    # id of database transaction that inserted or last updated the row, see migration d2f6a8c3e514
+    change_txid = db.Column(db.BigInteger, nullable=False, server_default=db.text("txid_current()"))
 
     user = relationship("user", back_populates="transactions")
 
     _transaction_user_timestamp_idx = db.Index("transaction_user_timestamp_idx", "user_id", "timestamp")
+    # covers (amount, mcc) with INCLUDE clause, see migration 5c7d9e1f3a20
+    _transaction_user_expense_idx = db.Index(
+        "transaction_user_expense_idx",
+        "user_id",
+        "timestamp",
+        postgresql_where=db.text("amount < 0")
+    )
+    # gin index over user_id requires btree_gin extension, see migration b5e8f2c4d719
+    _transaction_user_change_txid_idx = db.Index("transaction_user_change_txid_idx", "user_id", "change_txid", "id")
+    _transaction_user_info_trgm_idx = db.Index(
+        "transaction_user_info_trgm_idx",
+        "user_id",
+        "info",
+        postgresql_using="gin",
+        postgresql_ops={"info": "gin_trgm_ops"}
+    )
 
     @classmethod
     async def create(cls, transaction):
         """Create a new transaction in database."""
         try:
-            return await super().create(**transaction)
+            return await super().create(bind=shards.get_bind(transaction["user_id"]), **transaction)
         except exceptions.UniqueViolationError:
-            LOGGER.debug("A transaction with that id already exists. Transaction: %s", transaction)
-            raise DatabaseError("A transaction with such id already exists.")
+            LOGGER.debug("A transaction with that external id already exists. Transaction: %s", transaction)
+            raise DatabaseError("A transaction with such external id already exists.")
         except SQLAlchemyError as err:
             LOGGER.error("Could not create transaction. Error: %s", err)
             raise DatabaseError("Failed to create a new transaction in database.")
 
+    @classmethod
+    async def create_partitions(cls, months_ahead):
+        """Create monthly table partitions on each shard from current month to provided count of months ahead."""
+        try:
+            for bind in shards.binds:
+                await bind.scalar(db.select([func.create_transaction_partitions(months_ahead)]))
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not create transaction partitions. Error: %s", err)
+            raise DatabaseError("Failed to create transaction partitions.")
+
+    @staticmethod
+    def _crosses_archive_horizon(start_date):
+        """Check if period that starts from provided date may include archived transactions."""
+        return start_date < get_month_start(config.POSTGRES_TRANSACTION_ARCHIVE_HORIZON_MONTHS)
+
+    @classmethod
+    def _get_source(cls, with_archive):
+        """Return transactions selectable, archived transactions are included if requested."""
+        if not with_archive:
+            return cls.__table__
+
+        return union_all(
+            db.select(cls.__table__.columns),
+            db.select(TransactionArchive.__table__.columns)
+        ).alias("transactions")
+
     @classmethod
     async def create_bulk(cls, transactions):
-        """Bulk create transactions."""
-        for transaction in transactions:
-            try:
-                await cls.create(transaction)
-            except DatabaseError:
-                continue
+        """
+        Bulk create transactions skipping ones that already exist.
+        Return count of inserted and skipped transactions.
+        """
+        inserted = 0
+        users_transactions = itertools.groupby(
+            sorted(transactions, key=operator.itemgetter("user_id")),
+            key=operator.itemgetter("user_id")
+        )
+        for user_id, user_transactions in users_transactions:
+            user_transactions = list(user_transactions)
+            for chunk_start in range(0, len(user_transactions), BULK_INSERT_CHUNK_SIZE):
+                chunk = user_transactions[chunk_start:chunk_start + BULK_INSERT_CHUNK_SIZE]
+                query = insert(cls.__table__) \
+                    .values(chunk) \
+                    .on_conflict_do_nothing(index_elements=[cls.user_id, cls.external_id, cls.timestamp]) \
+                    .returning(cls.id)
+                try:
+                    inserted_ids = await shards.all(user_id, query)
+                except SQLAlchemyError as err:
+                    LOGGER.error("Could not bulk create transactions for user=%s. Error: %s", user_id, err)
+                    raise DatabaseError("Failed to create transactions in database.")
+
+                inserted += len(inserted_ids)
+
+        return inserted, len(transactions) - inserted
 
     @classmethod
-    async def get_transactions(cls, user_id, category, start_date, end_date):
-        """Retrieve transactions for provided period by user_id."""
-        filters = [
-            cls.user_id == user_id,
-            between(cls.timestamp, start_date, end_date)
-        ]
+    def _get_transactions_query(cls, query_name, user_id, category, start_date, end_date, limit, cursor):
+        """Return registered shape of transactions page query by name template and its params."""
+        with_archive = cls._crosses_archive_horizon(start_date)
+        query_name = query_name.format(
+            category=bool(category),
+            cursor=bool(cursor),
+            archive=with_archive
+        )
+        params = {
+            "user_id": user_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "limit": limit + 1
+        }
         if category:
-            filters.append(MCCCategory.name == category)
+            params["category"] = category
+        if cursor:
+            params["cursor_timestamp"], params["cursor_id"] = cursor
+
+        return QUERY_REGISTRY.get(query_name), params
 
+    @classmethod
+    async def delete_batch(cls, user_id, batch_size, archived=False):
+        """
+        Delete batch of user`s transactions or archived transactions.
+        Return count of deleted transactions.
+        """
+        table = TransactionArchive.__table__ if archived else cls.__table__
+        batch = db.select([table.c.id, table.c.timestamp]).where(table.c.user_id == user_id).limit(batch_size)
+        query = table.delete().where(tuple_(table.c.id, table.c.timestamp).in_(batch)).returning(table.c.id)
         try:
-            transactions = await db \
-                .select([
-                    cls.id,
-                    cls.user_id,
-                    cast(cls.amount, db.String).label("amount"),
-                    cast(cls.balance, db.String).label("balance"),
-                    cast(cls.cashback, db.String).label("cashback"),
-                    func.to_char(cls.timestamp, "YYYY.MM.DD HH24:MI:SS").label("timestamp"),
-                    cls.mcc,
-                    cls.info,
-                    MCCCategory.name.label("category_name")
-                ]) \
-                .select_from(cls.join(MCC.join(MCCCategory))) \
-                .where(and_(*filters)) \
-                .order_by(cls.timestamp.desc()) \
-                .gino.all()
+            deleted_ids = await shards.all(user_id, query)
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not delete transactions batch for user=%s. Error: %s", user_id, err)
+            raise DatabaseError("Failed to delete transactions for requested user.")
+
+        return len(deleted_ids)
+
+    @classmethod
+    async def get_transactions(cls, user_id, category, start_date, end_date, limit, cursor=None):
+        """
+        Retrieve page of transactions for provided period by user_id.
+        Return transactions and cursor of the next page if there are more transactions.
+        """
+        query, params = cls._get_transactions_query(
+            TRANSACTIONS_QUERY_NAME, user_id, category, start_date, end_date, limit, cursor
+        )
+        try:
+            transactions = await query.all(**params)
         except SQLAlchemyError as err:
             LOGGER.error("Could not retrieve transactions for user=%s. Error: %s", user_id, err)
             raise DatabaseError("Failed to retrieve transactions for requested user")
 
-        return [dict(item) for item in transactions]
+        return cls._get_page([dict(item) for item in transactions], limit)
+
+    @staticmethod
+    def _get_page(transactions, limit):
+        """Return page of transactions and cursor of the next page from transactions fetched with one extra."""
+        next_cursor = None
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last_transaction = transactions[-1]
+            next_cursor = encode_cursor(last_transaction["timestamp"], last_transaction["id"])
+
+        return transactions, next_cursor
 
     @classmethod
-    async def _get_month_report(cls, user_id, year, month):
-        """Retrieve transaction report for specific month."""
+    async def search_transactions(cls, user_id, text, limit, cursor=None):
+        """
+        Retrieve page of user`s transactions which info contains provided text.
+        Return transactions and cursor of the next page if there are more transactions.
+        """
+        params = {
+            "user_id": user_id,
+            "pattern": _build_search_pattern(text),
+            "limit": limit + 1
+        }
+        if cursor:
+            params["cursor_timestamp"], params["cursor_id"] = cursor
+
         try:
-            reports = await db \
-                .select([
-                    MCCCategory.name,
-                    MCCCategory.info,
-                    cast(func.abs(func.sum(cls.amount)), db.String).label("amount")
-                ]) \
-                .select_from(cls.join(MCC.join(MCCCategory))) \
-                .where(
-                    (cls.user_id == user_id) &
-                    (cls.amount < 0) &
-                    (extract("month", cls.timestamp) == month) &
-                    (extract("year", cls.timestamp) == year)
-                ) \
-                .group_by(MCCCategory.name, MCCCategory.info) \
-                .gino.all()
+            transactions = await QUERY_REGISTRY.get(SEARCH_QUERY_NAME.format(cursor=bool(cursor))).all(**params)
         except SQLAlchemyError as err:
-            LOGGER.error("Could not retrieve month transaction report for user=%s. Error: %s", user_id, err)
-            raise DatabaseError("Failed to retrieve monthly report for requested user.")
+            LOGGER.error("Could not search transactions for user=%s. Error: %s", user_id, err)
+            raise DatabaseError("Failed to search transactions for requested user")
 
-        return [dict(item) for item in reports]
+        return cls._get_page([dict(item) for item in transactions], limit)
+
+    @classmethod
+    async def get_changes(cls, user_id, since, limit):
+        """
+        Retrieve page of user`s transactions inserted or updated after provided (change_txid, id, with_archive)
+        position. Archived transactions are included only while the whole history is synchronized.
+        Return transactions, token of the position after the last one and whether there are more changes.
+        """
+        since_txid, since_id, with_archive = since
+        params = {
+            "user_id": user_id,
+            "since_txid": since_txid,
+            "since_id": since_id,
+            "limit": limit + 1
+        }
+        try:
+            transactions = await QUERY_REGISTRY.get(CHANGES_QUERY_NAME.format(archive=with_archive)).all(**params)
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not retrieve transactions changes for user=%s. Error: %s", user_id, err)
+            raise DatabaseError("Failed to retrieve transactions changes for requested user")
+
+        transactions = [dict(item) for item in transactions]
+        has_more = len(transactions) > limit
+        transactions = transactions[:limit]
+
+        next_position = since_txid, since_id
+        if transactions:
+            next_position = transactions[-1]["change_txid"], transactions[-1]["id"]
+        for transaction in transactions:
+            del transaction["change_txid"]
+
+        # archive is not changed after rows are moved there, so it is skipped once history is synchronized
+        return transactions, encode_change_token(*next_position, with_archive and has_more), has_more
+
+    @classmethod
+    async def iterate_history(cls, user_id, chunk_size):
+        """
+        Iterate over all user`s transactions (including archived ones) by chunks of provided size.
+        Transactions are fetched by server-side cursor, so only one chunk is kept in memory.
+        """
+        # long-lived cursor on hot standby may be cancelled by recovery conflicts, so replica is not used
+        bind = shards.get_bind(user_id) or db
+        try:
+            async with bind.acquire() as connection:
+                async with connection.transaction():
+                    cursor = await connection.iterate(cls.build_export_query(), user_id=user_id)
+                    transactions = await cursor.many(chunk_size)
+                    while transactions:
+                        yield [dict(item) for item in transactions]
+                        transactions = await cursor.many(chunk_size)
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not export transactions for user=%s. Error: %s", user_id, err)
+            raise DatabaseError("Failed to export transactions for requested user")
+
+    @classmethod
+    async def get_transactions_json(cls, user_id, category, start_date, end_date, limit, cursor=None):
+        """
+        Retrieve page of transactions for provided period by user_id serialized to JSON by database.
+        Return JSON array of transactions and cursor of the next page if there are more transactions.
+        """
+        query, params = cls._get_transactions_query(
+            TRANSACTIONS_JSON_QUERY_NAME, user_id, category, start_date, end_date, limit, cursor
+        )
+        params["page_limit"] = limit
+        try:
+            page = await query.first(**params)
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not retrieve transactions for user=%s. Error: %s", user_id, err)
+            raise DatabaseError("Failed to retrieve transactions for requested user")
+
+        next_cursor = None
+        if page["count"] > limit:
+            next_cursor = encode_cursor(page["cursor_timestamp"], page["cursor_id"])
+
+        return page["transactions"], next_cursor
+
+    @classmethod
+    def build_transactions_query(cls, with_category, with_cursor, with_archive):
+        """
+        Return query of transactions page for provided half-open [start_date, end_date) period by user_id.
+        Transactions are ordered by (timestamp, id) descending, the cursor
+        is a (timestamp, id) position of the last transaction from previous page.
+        """
+        source = cls._get_source(with_archive)
+        transaction = source.c
+        filters = [
+            transaction.user_id == bindparam("user_id"),
+            transaction.timestamp >= bindparam("start_date", type_=db.DateTime),
+            transaction.timestamp < bindparam("end_date", type_=db.DateTime)
+        ]
+        if with_category:
+            filters.append(MCCCategory.name == bindparam("category"))
+
+        return cls._build_page_query(source, filters, with_cursor)
+
+    @classmethod
+    def build_search_query(cls, with_cursor):
+        """
+        Return query of transactions page (including archived ones) which info
+        matches ILIKE pattern. The pattern is looked up by trigram index.
+        """
+        source = cls._get_source(with_archive=True)
+        transaction = source.c
+        filters = [
+            transaction.user_id == bindparam("user_id"),
+            transaction.info.ilike(bindparam("pattern", type_=db.String), escape=SEARCH_ESCAPE)
+        ]
+
+        return cls._build_page_query(source, filters, with_cursor)
+
+    @classmethod
+    def build_export_query(cls):
+        """Return query of all user`s transactions (including archived ones) ordered by (timestamp, id)."""
+        source = cls._get_source(with_archive=True)
+        transaction = source.c
+        return db \
+            .select(cls._get_page_columns(transaction)) \
+            .select_from(source.join(MCC.join(MCCCategory), transaction.mcc == MCC.code)) \
+            .where(transaction.user_id == bindparam("user_id")) \
+            .order_by(transaction.timestamp, transaction.id)
+
+    @classmethod
+    def build_changes_query(cls, with_archive):
+        """
+        Return query of user`s transactions changed after (change_txid, id) position ordered by the position.
+        Rows changed by database transactions that are in progress at the moment of query
+        are skipped until they are finished, so transaction that commits later with
+        lower txid can not be missed by client that has already received higher position.
+        Archived transactions keep their change_txid, so they are included if requested.
+        """
+        source = cls._get_source(with_archive)
+        transaction = source.c
+        since_txid = bindparam("since_txid", type_=db.BigInteger)
+        since_id = bindparam("since_id", type_=db.BigInteger)
+        filters = [
+            transaction.user_id == bindparam("user_id"),
+            # plain range bound lets planner use it as index condition
+            transaction.change_txid >= since_txid,
+            tuple_(transaction.change_txid, transaction.id) > tuple_(since_txid, since_id),
+            transaction.change_txid < func.txid_snapshot_xmin(func.txid_current_snapshot())
+        ]
+
+        return db \
+            .select([*cls._get_page_columns(transaction), transaction.change_txid]) \
+            .select_from(source.join(MCC.join(MCCCategory), transaction.mcc == MCC.code)) \
+            .where(and_(*filters)) \
+            .order_by(transaction.change_txid, transaction.id) \
+            .limit(bindparam("limit", type_=db.Integer))
+
+    @staticmethod
+    def _get_page_columns(transaction):
+        """Return columns of transactions page response from provided transaction columns."""
+        return [
+            transaction.id,
+            transaction.external_id,
+            transaction.user_id,
+            transaction.amount,
+            transaction.balance,
+            transaction.cashback,
+            func.to_char(transaction.timestamp, "YYYY.MM.DD HH24:MI:SS").label("timestamp"),
+            transaction.mcc,
+            transaction.info,
+            MCCCategory.name.label("category_name")
+        ]
+
+    @classmethod
+    def _build_page_query(cls, source, filters, with_cursor):
+        """Return query of transactions page from source filtered by provided filters and cursor."""
+        transaction = source.c
+        if with_cursor:
+            cursor_timestamp = bindparam("cursor_timestamp", type_=db.DateTime)
+            cursor_id = bindparam("cursor_id", type_=db.BigInteger)
+            # plain range bound lets planner use it as index condition
+            filters.append(transaction.timestamp <= cursor_timestamp)
+            filters.append(tuple_(transaction.timestamp, transaction.id) < tuple_(cursor_timestamp, cursor_id))
+
+        return db \
+            .select(cls._get_page_columns(transaction)) \
+            .select_from(source.join(MCC.join(MCCCategory), transaction.mcc == MCC.code)) \
+            .where(and_(*filters)) \
+            .order_by(transaction.timestamp.desc(), transaction.id.desc()) \
+            .limit(bindparam("limit", type_=db.Integer))
+
+    @classmethod
+    def build_transactions_json_query(cls, with_category, with_cursor, with_archive):
+        """
+        Return query of transactions page serialized to JSON array by database.
+        Besides the array query returns count of fetched transactions and
+        (timestamp, id) position of the last transaction in the page.
+        """
+        page = cls.build_transactions_query(with_category, with_cursor, with_archive).alias("page")
+        numbered = db \
+            .select([
+                page,
+                func.row_number().over(order_by=(page.c.timestamp.desc(), page.c.id.desc())).label("position")
+            ]) \
+            .alias("numbered")
+        transaction = numbered.c
+
+        # page query fetches one extra transaction to find out whether next page exists
+        page_limit = bindparam("page_limit", type_=db.Integer)
+        fields = {
+            "id": transaction.id,
+            "external_id": transaction.external_id,
+            "user_id": transaction.user_id,
+            "amount": format_amount_column(transaction.amount),
+            "balance": format_amount_column(transaction.balance),
+            "cashback": format_amount_column(transaction.cashback),
+            "timestamp": transaction.timestamp,
+            "mcc": transaction.mcc,
+            "info": transaction.info,
+            "category_name": transaction.category_name,
+        }
+        return db.select([
+            build_json_array(fields, (transaction.position,), transaction.position <= page_limit).label("transactions"),
+            func.count().label("count"),
+            func.min(transaction.timestamp).filter(transaction.position == page_limit).label("cursor_timestamp"),
+            func.min(transaction.id).filter(transaction.position == page_limit).label("cursor_id"),
+        ])
+
+    @classmethod
+    async def _get_month_report(cls, user_id, year, month):
+        """Retrieve transaction report for specific month from month reports rollup."""
+        return await TransactionMonthReport.get_reports(user_id, year, month)
 
     @classmethod
     async def get_month_report(cls, user_id, year, month):
@@ -124,34 +478,238 @@ class Transaction(db.Model, BaseModelMixin):
         if current_month:
             return await cls._get_month_report(user_id, year, month)
 
-        month_report_cache_key = MONTH_REPORT_CACHE_KEY.format(user_id=user_id, year=year, month=month)
-        reports = await cache.get(month_report_cache_key)
-        if not reports:
-            reports = await cls._get_month_report(user_id, year, month)
-            if not current_month and reports:
-                await cache.set(month_report_cache_key, reports, MONTH_REPORT_CACHE_EXPIRE)
-
-        return reports
+        generation = await get_generation(TRANSACTIONS_GENERATION, user_id)
+        return await get_or_compute(
+            MONTH_REPORT_CACHE_KEY.format(user_id=user_id, generation=generation, year=year, month=month),
+            functools.partial(cls._get_month_report, user_id, year, month),
+            MONTH_REPORT_CACHE_EXPIRE
+        )
 
     @classmethod
     async def get_daily_reports(cls, user_id, start_date, end_date):
         """Retrieve daily transactions reports for specific period of time."""
+        return await cls.get_timeseries_reports(user_id, start_date, end_date, "day")
+
+    @classmethod
+    async def get_daily_reports_json(cls, user_id, start_date, end_date):
+        """Retrieve daily transactions reports for specific period of time serialized to JSON array by database."""
+        return await cls.get_timeseries_reports_json(user_id, start_date, end_date, "day")
+
+    @classmethod
+    def build_timeseries_query(cls, user_id, start_date, end_date, interval):
+        """
+        Return query of spent amount for each interval bucket (hour, day, week or month)
+        in specific period of time. Buckets without spendings are filled with zero.
+        Day, week and month buckets are aggregated from daily reports rollup,
+        hour buckets are aggregated from transactions (and archive) of half-open
+        [start_date, end_date) period directly by expenses covering index.
+        """
+        if interval not in TIMESERIES_INTERVALS:
+            raise DatabaseError(f"The interval `{interval}` is not supported.")
+
+        step = literal_column(f"interval '1 {interval}'")
+        buckets = db \
+            .select([
+                func.generate_series(
+                    func.date_trunc(interval, cast(start_date, db.DateTime)),
+                    func.date_trunc(interval, cast(end_date, db.DateTime)),
+                    step
+                ).label("bucket")
+            ]) \
+            .alias("buckets")
+        bucket = buckets.c.bucket
+
+        if interval == "hour":
+            source = cls._get_source(cls._crosses_archive_horizon(start_date))
+            transaction = source.c
+            date_format = TIMESERIES_DATETIME_FORMAT
+            amount = func.abs(transaction.amount)
+            onclause = and_(
+                transaction.user_id == user_id,
+                # literal lets generic plan of prepared statement match partial expenses index predicate
+                transaction.amount < literal_column("0"),
+                transaction.timestamp >= start_date,
+                transaction.timestamp < end_date,
+                transaction.timestamp >= bucket,
+                transaction.timestamp < bucket + step
+            )
+        else:
+            report = TransactionDailyReport
+            date_format = TIMESERIES_DATE_FORMAT
+            source, amount = report, report.amount
+            onclause = and_(
+                report.user_id == user_id,
+                between(report.date, start_date.date(), end_date.date()),
+                report.date >= bucket,
+                report.date < bucket + step
+            )
+
+        return db \
+            .select([
+                func.to_char(bucket, date_format).label("date"),
+                cast(func.coalesce(func.sum(amount), 0), db.BigInteger).label("amount")
+            ]) \
+            .select_from(buckets.outerjoin(source, onclause)) \
+            .group_by(bucket) \
+            .order_by(bucket)
+
+    @classmethod
+    async def get_timeseries_reports(cls, user_id, start_date, end_date, interval):
+        """Retrieve spent amount for each interval bucket in specific period of time."""
+        query = cls.build_timeseries_query(user_id, start_date, end_date, interval)
         try:
-            reports = await db \
-                .select([
-                    func.date_trunc("day", cls.timestamp).label("date"),
-                    cast(func.abs(func.sum(cls.amount)), db.String).label("amount")
-                ]) \
-                .select_from(cls) \
-                .where(
-                    (cls.user_id == user_id) &
-                    (cls.amount < 0) &
-                    (between(cls.timestamp, start_date, end_date))
-                ) \
-                .group_by("date") \
-                .gino.all()
+            reports = await shards.all(user_id, query, read_only=True)
         except SQLAlchemyError as err:
-            LOGGER.error("Could not retrieve daily transactions reports for user=%s. Error: %s", user_id, err)
-            raise DatabaseError("Failed to retrieve daily transactions reports for requested user.")
+            LOGGER.error("Could not retrieve %s transactions reports for user=%s. Error: %s", interval, user_id, err)
+            raise DatabaseError(f"Failed to retrieve {interval} transactions reports for requested user.")
+
+        return [dict(item) for item in reports]
+
+    @classmethod
+    async def get_timeseries_reports_json(cls, user_id, start_date, end_date, interval):
+        """Retrieve spent amount for each interval bucket serialized to JSON array by database."""
+        reports = cls.build_timeseries_query(user_id, start_date, end_date, interval).alias("reports")
+        # both date formats sort chronologically
+        fields = {"date": reports.c.date, "amount": format_amount_column(reports.c.amount)}
+        query = db.select([build_json_array(fields, (reports.c.date,)).label("reports")])
+
+        try:
+            reports = await shards.first(user_id, query, read_only=True)
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not retrieve %s transactions reports for user=%s. Error: %s", interval, user_id, err)
+            raise DatabaseError(f"Failed to retrieve {interval} transactions reports for requested user.")
+
+        return reports["reports"]
+
+
+class TransactionMonthReport(db.Model, BaseModelMixin):
+    """
+    Class that represents rollup of user`s spendings by category for month.
+    Rows are maintained by database triggers on transaction table.
+    """
+    __tablename__ = "transaction_month_report"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    year = db.Column(db.SmallInteger, primary_key=True)
+    month = db.Column(db.SmallInteger, primary_key=True)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey("mcc_category.id", ondelete="CASCADE"), primary_key=True)
+    amount = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def build_reports_query(cls):
+        """Return query of spent amount by categories for specific month."""
+        return db \
+            .select([
+                MCCCategory.name,
+                MCCCategory.info,
+                cls.amount
+            ]) \
+            .select_from(cls.join(MCCCategory)) \
+            .where(
+                (cls.user_id == bindparam("user_id")) &
+                (cls.year == bindparam("year")) &
+                (cls.month == bindparam("month")) &
+                (cls.amount > 0)
+            )
+
+    @classmethod
+    async def get_reports(cls, user_id, year, month):
+        """Retrieve spent amount by categories for specific month."""
+        try:
+            reports = await QUERY_REGISTRY.get("transaction.get_month_report").all(
+                user_id=user_id,
+                year=year,
+                month=month
+            )
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not retrieve month transaction report for user=%s. Error: %s", user_id, err)
+            raise DatabaseError("Failed to retrieve monthly report for requested user.")
+
+        return [dict(item) for item in reports]
+
+
+class TransactionDailyReport(db.Model, BaseModelMixin):
+    """
+    Class that represents rollup of user`s spendings for day.
+    Rows are maintained by database triggers on transaction table.
+    """
+    __tablename__ = "transaction_daily_report"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    amount = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class TransactionArchive(db.Model, BaseModelMixin):
+    """
+    Class that represents archived Transaction in system.
+    Transactions older than archive horizon are moved here from transaction table.
+    """
+    __tablename__ = "transaction_archive"
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    external_id = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)
+    balance = db.Column(db.BigInteger)
+    cashback = db.Column(db.BigInteger, default=0)
+    mcc = db.Column(db.Integer, db.ForeignKey("mcc.code"))
+    timestamp = db.Column(db.DateTime, primary_key=True)
+    info = db.Column(db.String(255), nullable=False, default="")
+    change_txid = db.Column(db.BigInteger, nullable=False)
+
+    _transaction_archive_user_timestamp_idx = db.Index(
+        "transaction_archive_user_timestamp_idx",
+        "user_id",
+        "timestamp"
+    )
+    _transaction_archive_user_info_trgm_idx = db.Index(
+        "transaction_archive_user_info_trgm_idx",
+        "user_id",
+        "info",
+        postgresql_using="gin",
+        postgresql_ops={"info": "gin_trgm_ops"}
+    )
+
+
+def _build_search_pattern(text):
+    """Return ILIKE pattern that matches info containing provided text literally."""
+    escaped_text = text \
+        .replace(SEARCH_ESCAPE, SEARCH_ESCAPE * 2) \
+        .replace("%", f"{SEARCH_ESCAPE}%") \
+        .replace("_", f"{SEARCH_ESCAPE}_")
+    return f"%{escaped_text}%"
+
+
+def _register_transactions_queries():
+    """Register all shapes of transactions page, search and changes queries."""
+    for with_cursor in (False, True):
+        QUERY_REGISTRY.register(
+            SEARCH_QUERY_NAME.format(cursor=with_cursor),
+            functools.partial(Transaction.build_search_query, with_cursor),
+            read_only=True,
+            sample_params={"pattern": _build_search_pattern("100%_off!")}
+        )
+
+    for with_archive in (False, True):
+        QUERY_REGISTRY.register(
+            CHANGES_QUERY_NAME.format(archive=with_archive),
+            functools.partial(Transaction.build_changes_query, with_archive),
+            read_only=True
+        )
+
+    for with_category, with_cursor, with_archive in itertools.product((False, True), repeat=3):
+        QUERY_REGISTRY.register(
+            TRANSACTIONS_QUERY_NAME.format(category=with_category, cursor=with_cursor, archive=with_archive),
+            functools.partial(Transaction.build_transactions_query, with_category, with_cursor, with_archive),
+            read_only=True
+        )
+        QUERY_REGISTRY.register(
+            TRANSACTIONS_JSON_QUERY_NAME.format(category=with_category, cursor=with_cursor, archive=with_archive),
+            functools.partial(Transaction.build_transactions_json_query, with_category, with_cursor, with_archive),
+            read_only=True
+        )
+
 
-        return reports
+_register_transactions_queries()
+QUERY_REGISTRY.register("transaction.get_month_report", TransactionMonthReport.build_reports_query, read_only=True)
@@ -4,11 +4,11 @@ import logging
 
 import bcrypt
 from asyncpg import exceptions
-from sqlalchemy import func
+from sqlalchemy import func, bindparam
 from sqlalchemy.orm import relationship
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.db import db
+from app.db import db, shards, QUERY_REGISTRY
 from app.models import BaseModelMixin, parse_status
 from app.utils.errors import DatabaseError, DBNoResultFoundError
 
@@ -30,12 +30,16 @@ class User(db.Model, BaseModelMixin):
     notifications_enabled = db.Column(db.Boolean, nullable=False, default=False)
     monobank_token = db.Column(db.String(255), nullable=False, default="")
     created = db.Column(db.DateTime, nullable=False, default=func.now())
+    # data of deleted user is removed by background job, see delete_user_data
+    deleted = db.Column(db.DateTime)
 
     budget = relationship("budget", back_populates="user", uselist=False)
     transactions = relationship("transaction", back_populates="user")
     limits = relationship("limit", back_populates="user")
 
-    private_columns = ["password", "monobank_token"]
+    _user_deleted_idx = db.Index("user_deleted_idx", "deleted", postgresql_where=db.text("deleted IS NOT NULL"))
+
+    private_columns = ["password", "monobank_token", "deleted"]
 
     def as_dict(self):
         """Return user instance information in dictionary format."""
@@ -61,7 +65,7 @@ class User(db.Model, BaseModelMixin):
     async def get_by_id(cls, user_id):
         """Return queried user by provided id."""
         try:
-            user = await cls.get(user_id)
+            user = await QUERY_REGISTRY.get("user.get_by_id").first(user_id=user_id)
         except SQLAlchemyError as err:
             LOGGER.error("Could not retrieve user=%s. Error: %s", user_id, err)
             raise DatabaseError("Failed to retrieve requested user.")
@@ -69,13 +73,13 @@ class User(db.Model, BaseModelMixin):
         if not user:
             raise DBNoResultFoundError("The user does not exist.")
 
-        return user
+        return cls(**dict(user))
 
     @classmethod
     async def get_by_email(cls, email):
         """Return queried user by provided email."""
         try:
-            user = await cls.query.where(User.email == email).gino.first()
+            user = await shards.scatter_first(cls.query.where((User.email == email) & User.deleted.is_(None)))
         except SQLAlchemyError as err:
             LOGGER.error("Could not retrieve user=%s. Error: %s", email, err)
             raise DatabaseError(f"Failed to retrieve user={email}")
@@ -89,7 +93,8 @@ class User(db.Model, BaseModelMixin):
     async def get_by_telegram_id(cls, telegram_id):
         """Return queried user by provided telegram id."""
         try:
-            user = await cls.query.where(User.telegram_id == telegram_id).gino.first()
+            query = cls.query.where((User.telegram_id == telegram_id) & User.deleted.is_(None))
+            user = await shards.scatter_first(query)
         except SQLAlchemyError as err:
             LOGGER.error("Could not retrieve user telegram_id=%s. Error: %s", telegram_id, err)
             raise DatabaseError(f"Failed to retrieve user telegram_id={telegram_id}")
@@ -101,23 +106,41 @@ class User(db.Model, BaseModelMixin):
 
     @classmethod
     async def create(cls, email, password):
-        """Create a new user in database."""
+        """
+        Create a new user in database. User id is allocated by primary database sequence,
+        so ids are unique across shards, and email is reserved in primary database global
+        index, so it is unique across shards. The index is kept even if sharding is not
+        configured, so it is complete once sharding is enabled.
+        """
         try:
-            return await super().create(email=email, password=password)
+            user_id = await db.scalar(db.select([func.nextval("user_id_seq")]))
+            await UserEmail.create(email=email, user_id=user_id)
         except exceptions.UniqueViolationError:
             raise DatabaseError("A user with such email already exists.")
         except SQLAlchemyError as err:
             LOGGER.error("Could not create user=%s. Error: %s", email, err)
             raise DatabaseError("Failed to create a new user in database.")
 
+        try:
+            return await super().create(bind=shards.get_bind(user_id), id=user_id, email=email, password=password)
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not create user=%s. Error: %s", email, err)
+            await UserEmail.release(user_id)
+            raise DatabaseError("Failed to create a new user in database.")
+
     @classmethod
     async def update(cls, user_id, **kwargs):
-        """Update user instance in database by user_id."""
+        """Update user instance in database by user_id. Changed email is reserved in global index first."""
         try:
-            status, _ = await super().update \
-                .values(**kwargs) \
-                .where(cls.id == user_id) \
-                .gino.status()
+            if "email" in kwargs:
+                await UserEmail.update \
+                    .values(email=kwargs["email"]) \
+                    .where(UserEmail.user_id == user_id) \
+                    .gino.status()
+
+            status, _ = await shards.status(user_id, super().update.values(**kwargs).where(cls.id == user_id))
+        except exceptions.UniqueViolationError:
+            raise DatabaseError("A user with such email already exists.")
         except SQLAlchemyError as err:
             LOGGER.error("Could not update user=%s. Error: %s", user_id, err)
             raise DatabaseError("Failed to update requested user")
@@ -126,11 +149,30 @@ class User(db.Model, BaseModelMixin):
         if not updated:
             raise DatabaseError("The user was not updated.")
 
+    @classmethod
+    async def mark_deleted(cls, user_id):
+        """Mark user instance as deleted, so user is not available anymore while his data is being deleted."""
+        try:
+            status, _ = await shards.status(
+                user_id,
+                super().update.values(deleted=func.now()).where((cls.id == user_id) & cls.deleted.is_(None))
+            )
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not mark user=%s as deleted. Error: %s", user_id, err)
+            raise DatabaseError("Failed to delete requested user")
+
+        marked = parse_status(status)
+        if not marked:
+            raise DatabaseError("The user was not deleted.")
+
     @classmethod
     async def delete(cls, user_id):
-        """Delete user instance by provided id."""
+        """Delete user instance by provided id and release his email in global index."""
+        # email is released first, so deletion retry does not leave it reserved
+        await UserEmail.release(user_id)
+
         try:
-            status, _ = await super().delete.where(cls.id == user_id).gino.status()
+            status, _ = await shards.status(user_id, super().delete.where(cls.id == user_id))
         except SQLAlchemyError as err:
             LOGGER.error("Could not delete user=%s. Error: %s", user_id, err)
             raise DatabaseError("Failed to delete requested user")
@@ -138,3 +180,33 @@ class User(db.Model, BaseModelMixin):
         deleted = parse_status(status)
         if not deleted:
             raise DatabaseError("The user was not deleted.")
+
+
+class UserEmail(db.Model, BaseModelMixin):
+    """
+    Class that represents global index of users emails. It is stored in primary
+    database, so its unique constraint prevents concurrent sign up with the same
+    email on different shards.
+    """
+    __tablename__ = "user_email"
+
+    email = db.Column(db.String(255), primary_key=True)
+    # user is stored in another database, so there is no foreign key
+    user_id = db.Column(db.Integer, nullable=False, unique=True)
+
+    @classmethod
+    async def release(cls, user_id):
+        """Delete email of provided user from global index."""
+        try:
+            await cls.delete.where(cls.user_id == user_id).gino.status()
+        except SQLAlchemyError as err:
+            LOGGER.error("Could not release email of user=%s. Error: %s", user_id, err)
+            raise DatabaseError("Failed to release email of requested user")
+
+
+def _build_user_query():
+    """Return query of user by id."""
+    return db.select(User.__table__.columns).where((User.id == bindparam("user_id")) & User.deleted.is_(None))
+
+
+QUERY_REGISTRY.register("user.get_by_id", _build_user_query)
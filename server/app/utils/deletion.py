@@ -0,0 +1,33 @@
+"""This module provides background deletion of user`s data."""
+
+import asyncio
+import logging
+
+from app import config
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.utils.misc import retry
+from app.utils.errors import DatabaseError, RetryError
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+@retry(times=3)
+async def delete_user_data(user_id):
+    """
+    Delete user`s transactions by bounded batches, so each statement holds locks for short time,
+    and then delete the user, the rest of his data is deleted by cascade.
+    """
+    batch_size = config.POSTGRES_DELETION_BATCH_SIZE
+    try:
+        for archived in (False, True):
+            while await Transaction.delete_batch(user_id, batch_size, archived) == batch_size:
+                # let other coroutines use the connection pool between batches
+                await asyncio.sleep(0)
+
+        await User.delete(user_id)
+    except DatabaseError:
+        raise RetryError
+
+    LOGGER.info("User=%s data was successfully deleted.", user_id)
@@ -32,3 +32,7 @@ class DatabaseError(BaseError):
 
 class DBNoResultFoundError(DatabaseError):
     """Class that represents errors caused on not existing entity."""
+
+
+class DBPermissionDeniedError(DatabaseError):
+    """Class that represents errors caused on interaction with entity of another user."""
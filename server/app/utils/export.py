@@ -0,0 +1,135 @@
+"""This module provides writers that serialize transactions export chunk by chunk."""
+
+import io
+import csv
+import json
+
+try:
+    import pyarrow
+    from pyarrow import parquet
+except ImportError:  # parquet export is available only when pyarrow is installed
+    pyarrow = None
+
+# tables are built from rows by Table.from_pylist that was added in pyarrow 7
+PARQUET_AVAILABLE = pyarrow is not None and hasattr(pyarrow.Table, "from_pylist")
+
+
+EXPORT_FIELDS = (
+    "id", "external_id", "amount", "balance", "cashback", "timestamp", "mcc", "info", "category_name"
+)
+
+
+class CSVExportWriter:
+    """Class that serializes transactions to CSV with header row."""
+    content_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self):
+        """Initialize writer with empty buffer."""
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, transactions):
+        """Return bytes of provided transactions chunk."""
+        self._writer.writerows(transactions)
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data.encode("utf-8")
+
+    def close(self):
+        """Return the rest of export bytes."""
+        return self.write([])
+
+
+class NDJSONExportWriter:
+    """Class that serializes transactions to newline delimited JSON."""
+    content_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    @staticmethod
+    def write(transactions):
+        """Return bytes of provided transactions chunk."""
+        lines = (json.dumps({field: item[field] for field in EXPORT_FIELDS}) + "\n" for item in transactions)
+        return "".join(lines).encode("utf-8")
+
+    @staticmethod
+    def close():
+        """Return the rest of export bytes."""
+        return b""
+
+
+class _ParquetSink:
+    """Class that represents write only file which bytes are taken by parquet writer consumer."""
+
+    def __init__(self):
+        """Initialize empty sink."""
+        self.closed = False
+        self._buffer = io.BytesIO()
+        self._position = 0
+
+    def write(self, data):
+        """Append provided bytes to sink."""
+        self._buffer.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        """Return count of bytes written to sink."""
+        return self._position
+
+    def flush(self):
+        """Do nothing, bytes are taken by pop."""
+
+    def pop(self):
+        """Return bytes written since the last pop."""
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class ParquetExportWriter:
+    """
+    Class that serializes transactions to Parquet file. Each chunk is written
+    as a separate row group, so only the footer is kept until export is closed.
+    """
+    content_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self):
+        """Initialize parquet writer with transactions schema."""
+        self._schema = pyarrow.schema([
+            ("id", pyarrow.int64()),
+            ("external_id", pyarrow.string()),
+            ("amount", pyarrow.string()),
+            ("balance", pyarrow.string()),
+            ("cashback", pyarrow.string()),
+            ("timestamp", pyarrow.string()),
+            ("mcc", pyarrow.int32()),
+            ("info", pyarrow.string()),
+            ("category_name", pyarrow.string()),
+        ])
+        self._sink = _ParquetSink()
+        self._writer = parquet.ParquetWriter(self._sink, self._schema)
+
+    def write(self, transactions):
+        """Return bytes of provided transactions chunk."""
+        if transactions:
+            self._writer.write_table(pyarrow.Table.from_pylist(transactions, schema=self._schema))
+
+        return self._sink.pop()
+
+    def close(self):
+        """Return the rest of export bytes including parquet footer."""
+        self._writer.close()
+        return self._sink.pop()
+
+
+EXPORT_WRITERS = {
+    "csv": CSVExportWriter,
+    "ndjson": NDJSONExportWriter,
+}
+if PARQUET_AVAILABLE:
+    EXPORT_WRITERS["parquet"] = ParquetExportWriter
@@ -0,0 +1,38 @@
+"""This module provides helper functionality to convert money amounts at API boundary."""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import Numeric, String, cast, literal_column
+
+
+# amounts are stored in minor units (kopecks)
+MINOR_UNITS_EXPONENT = 2
+MINOR_UNITS_IN_MAJOR = 10 ** MINOR_UNITS_EXPONENT
+
+
+def to_minor_units(amount):
+    """Return integer amount in minor units converted from provided amount in major units."""
+    minor_amount = Decimal(str(amount)) * MINOR_UNITS_IN_MAJOR
+    return int(minor_amount.to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(amount):
+    """Return amount in major units formatted as string converted from provided amount in minor units."""
+    if amount is None:
+        return None
+
+    return str(Decimal(amount).scaleb(-MINOR_UNITS_EXPONENT))
+
+
+def format_amounts(items, *fields):
+    """
+    Return copies of items with provided fields converted from minor units to major units.
+    Items are not changed, because they may be shared by cache.
+    """
+    return [{**item, **{field: from_minor_units(item[field]) for field in fields}} for item in items]
+
+
+def format_amount_column(column):
+    """Return SQL expression that formats minor units column the same way as from_minor_units."""
+    major_amount = cast(column, Numeric) / literal_column(str(MINOR_UNITS_IN_MAJOR))
+    return cast(cast(major_amount, Numeric(20, MINOR_UNITS_EXPONENT)), String)
@@ -75,9 +75,7 @@ async def save_monobank_month_transactions(user_id, user_monobank_token):
         raise RetryError
 
     def prepare_transaction(transaction):
-        """Return formatted transaction."""
-        costs_converter = 100.0
-
+        """Return formatted transaction, monobank amounts are already in minor units."""
         mcc_code = transaction["mcc"]
         if mcc_code not in mccs:
             LOGGER.error("Could not find MCC code=%s in database. Transaction: %s", mcc_code, transaction)
@@ -85,10 +83,10 @@ async def save_monobank_month_transactions(user_id, user_monobank_token):
 
         return {
             "user_id": user_id,
-            "id": transaction["id"],
-            "amount": transaction["amount"] / costs_converter,
-            "balance": transaction["balance"] / costs_converter,
-            "cashback": transaction["cashbackAmount"] / costs_converter,
+            "external_id": transaction["id"],
+            "amount": transaction["amount"],
+            "balance": transaction["balance"],
+            "cashback": transaction["cashbackAmount"],
             "mcc": mcc_code,
             "timestamp": datetime.fromtimestamp(transaction["time"]),
             "info": transaction["description"],
@@ -96,5 +94,14 @@ async def save_monobank_month_transactions(user_id, user_monobank_token):
 
     transactions = [prepare_transaction(t) for t in data]
 
-    await Transaction.create_bulk(transactions)
-    LOGGER.info("User`s=%s transactions were loaded from monobank.", user_id)
+    try:
+        inserted, skipped = await Transaction.create_bulk(transactions)
+    except DatabaseError:
+        raise RetryError
+
+    LOGGER.info(
+        "User`s=%s transactions were loaded from monobank. Inserted: %s, skipped: %s.",
+        user_id,
+        inserted,
+        skipped
+    )
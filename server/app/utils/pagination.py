@@ -0,0 +1,73 @@
+"""This module provides helper functionality for keyset pagination."""
+
+import base64
+from datetime import datetime
+
+from app.utils.time import DATETIME_FORMAT
+
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+CURSOR_SEPARATOR = "|"
+
+
+def encode_cursor(timestamp, entity_id):
+    """Return opaque cursor that points to the provided (timestamp, id) position."""
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.strftime(DATETIME_FORMAT)
+
+    raw_cursor = f"{timestamp}{CURSOR_SEPARATOR}{entity_id}"
+    return base64.urlsafe_b64encode(raw_cursor.encode("utf-8")).decode("utf-8")
+
+
+def decode_cursor(cursor):
+    """
+    Return (timestamp, id) position decoded from opaque cursor.
+    Raises ValueError in case cursor is malformed.
+    """
+    raw_cursor = base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+    timestamp, separator, entity_id = raw_cursor.partition(CURSOR_SEPARATOR)
+    if not separator or not entity_id:
+        raise ValueError("The cursor is malformed.")
+
+    return datetime.strptime(timestamp, DATETIME_FORMAT), entity_id
+
+
+def parse_page_limit(limit):
+    """
+    Return page limit parsed from query argument.
+    Raises ValueError in case limit is out of range (1-MAX_PAGE_LIMIT).
+    """
+    if limit is None:
+        return DEFAULT_PAGE_LIMIT
+
+    limit = int(limit)
+    if not 0 < limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f"The limit is out of range (1-{MAX_PAGE_LIMIT}).")
+
+    return limit
+
+
+def encode_change_token(change_txid, entity_id, with_archive=False):
+    """
+    Return opaque token that points to the provided (change_txid, id) position in changes feed.
+    Token of initial synchronization also marks that archived transactions are included.
+    """
+    raw_token = f"{change_txid}{CURSOR_SEPARATOR}{entity_id}"
+    if with_archive:
+        raw_token = f"{raw_token}{CURSOR_SEPARATOR}archive"
+
+    return base64.urlsafe_b64encode(raw_token.encode("utf-8")).decode("utf-8")
+
+
+def decode_change_token(token):
+    """
+    Return (change_txid, id, with_archive) position decoded from opaque change token.
+    Raises ValueError in case token is malformed.
+    """
+    raw_token = base64.urlsafe_b64decode(token.encode("utf-8")).decode("utf-8")
+    parts = raw_token.split(CURSOR_SEPARATOR)
+    if len(parts) not in (2, 3) or parts[2:] not in ([], ["archive"]):
+        raise ValueError("The change token is malformed.")
+
+    return int(parts[0]), int(parts[1]), len(parts) == 3
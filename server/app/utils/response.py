@@ -1,5 +1,7 @@
 """This module provides helper functionality for web responses."""
 
+import json
+
 from aiohttp import web
 
 
@@ -11,3 +13,9 @@ def make_response(success, http_status, data=None, message=None):
         "data": data
     }
     return web.json_response(response, status=http_status)
+
+
+def make_raw_response(success, http_status, raw_data, message=None):
+    """Return formatted json response with data that is already serialized to json."""
+    body = f'{{"success": {json.dumps(success)}, "message": {json.dumps(message)}, "data": {raw_data}}}'
+    return web.Response(text=body, status=http_status, content_type="application/json")
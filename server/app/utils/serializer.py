@@ -0,0 +1,116 @@
+"""This module provides compact serializer for cached values."""
+
+import json
+import logging
+
+import msgpack
+from aiocache.serializers import BaseSerializer
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is available only when zstandard is installed
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:  # lz4 compression is available only when lz4 is installed
+    lz4 = None
+
+
+LOGGER = logging.getLogger(__name__)
+
+ENVELOPE_VERSION = 1
+# codecs are stored in envelope header, so their values must not be changed
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+COMPRESSION_LZ4 = 2
+COMPRESSIONS = {
+    "none": COMPRESSION_NONE,
+    "zstd": COMPRESSION_ZSTD,
+    "lz4": COMPRESSION_LZ4,
+}
+
+
+def compress(codec, data):
+    """Return data compressed by provided codec."""
+    if codec == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor().compress(data)
+    if codec == COMPRESSION_LZ4:
+        return lz4.frame.compress(data)
+
+    return data
+
+
+def decompress(codec, data):
+    """
+    Return data decompressed by provided codec.
+    Raises ValueError in case codec is unknown or not available or data is corrupted.
+    """
+    if codec == COMPRESSION_NONE:
+        return data
+    if codec == COMPRESSION_ZSTD and zstandard is not None:
+        try:
+            return zstandard.ZstdDecompressor().decompress(data)
+        except zstandard.ZstdError as err:
+            raise ValueError(f"The zstd data is corrupted: {err}")
+    if codec == COMPRESSION_LZ4 and lz4 is not None:
+        try:
+            return lz4.frame.decompress(data)
+        except RuntimeError as err:
+            raise ValueError(f"The lz4 data is corrupted: {err}")
+
+    raise ValueError(f"The compression codec={codec} is not available.")
+
+
+def is_compression_available(codec):
+    """Return whether compression by provided codec may be used."""
+    if codec == COMPRESSION_ZSTD:
+        return zstandard is not None
+    if codec == COMPRESSION_LZ4:
+        return lz4 is not None
+
+    return True
+
+
+class EnvelopeSerializer(BaseSerializer):
+    """
+    Class that serializes cached values to msgpack wrapped into versioned envelope.
+    Envelope header consists of version and compression codec bytes. Values are
+    compressed only if they are not smaller than compression min size. Values
+    without envelope were written by json serializer and are read as json.
+    """
+    # values are binary, so redis must not decode them
+    DEFAULT_ENCODING = None
+
+    def __init__(self, compression="none", compression_min_size=1024):
+        """Initialize serializer with compression name (none, zstd, lz4) and min size of compressed value."""
+        super().__init__()
+        self.compression = COMPRESSIONS[compression]
+        self.compression_min_size = compression_min_size
+        if not is_compression_available(self.compression):
+            LOGGER.warning("Cache compression=%s is not installed, values are stored uncompressed.", compression)
+            self.compression = COMPRESSION_NONE
+
+    def dumps(self, value):
+        """Return value packed to envelope."""
+        data = msgpack.packb(value, use_bin_type=True)
+        codec = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(data) >= self.compression_min_size:
+            codec = self.compression
+            data = compress(codec, data)
+
+        return bytes((ENVELOPE_VERSION, codec)) + data
+
+    def loads(self, value):
+        """Return value unpacked from envelope. Value that can not be unpacked is read as cache miss."""
+        if value is None:
+            return None
+
+        try:
+            if value[0] != ENVELOPE_VERSION:
+                return json.loads(value)
+
+            return msgpack.unpackb(decompress(value[1], value[2:]), raw=False)
+        except (ValueError, IndexError) as err:
+            LOGGER.warning("Could not unpack cached value. Error: %s", err)
+            return None
@@ -1,15 +1,31 @@
 """This module provides helper functionality with time."""
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 
 DATE_FORMAT = "%Y.%m.%d"
 DATETIME_FORMAT = "%Y.%m.%d %H:%M:%S"
 
 
-def generate_days_period(start_date, end_date):
-    """Yield days in provided date period."""
-    start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    days_count = (end_date - start_date).days + 1
-    for n_days in range(days_count):
-        yield start_date + timedelta(days=n_days)
+def get_month_start(months_ago=0):
+    """Return start datetime of the month that was provided count of months ago."""
+    today = datetime.today()
+    months = today.year * 12 + today.month - 1 - months_ago
+    return datetime(months // 12, months % 12 + 1, 1)
+
+
+def get_buckets_count(start_date, end_date, interval):
+    """Return count of interval buckets (hour, day, week or month) between provided dates."""
+    if end_date < start_date:
+        return 0
+    if interval == "hour":
+        start_hour = start_date.replace(minute=0, second=0, microsecond=0)
+        return int((end_date - start_hour).total_seconds() // 3600) + 1
+    if interval == "day":
+        return (end_date.date() - start_date.date()).days + 1
+    if interval == "week":
+        start_week = start_date.date() - timedelta(days=start_date.weekday())
+        end_week = end_date.date() - timedelta(days=end_date.weekday())
+        return (end_week - start_week).days // 7 + 1
+
+    return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
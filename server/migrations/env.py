@@ -13,7 +13,7 @@ from app.db import db, get_database_dsn
 from app.models.user import User
 from app.models.budget import Budget
 from app.models.mcc import MCC, MCCCategory
-from app.models.transaction import Transaction
+from app.models.transaction import Transaction, TransactionArchive, TransactionMonthReport, TransactionDailyReport
 from app.models.limit import Limit
 
 
@@ -23,7 +23,8 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", str(get_database_dsn()))
+# each shard is migrated separately: alembic -x dsn=<shard dsn> upgrade head
+config.set_main_option("sqlalchemy.url", context.get_x_argument(as_dictionary=True).get("dsn", str(get_database_dsn())))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,120 @@
+"""Transaction month report rollup
+
+Revision ID: 3f9a1c2b7d4e
+Revises: 7a37120dd47e
+Create Date: 2020-12-04 14:12:31.402187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d4e'
+down_revision = '7a37120dd47e'
+branch_labels = None
+depends_on = None
+
+create_month_report_triggers = """
+    CREATE OR REPLACE FUNCTION add_transaction_month_report() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                INSERT INTO "transaction_month_report" (user_id, year, month, category_id, amount)
+                     SELECT new_rows.user_id,
+                            extract(year FROM new_rows.timestamp),
+                            extract(month FROM new_rows.timestamp),
+                            mcc.category_id,
+                            abs(sum(new_rows.amount))
+                       FROM new_rows
+                       JOIN mcc ON mcc.code = new_rows.mcc
+                      WHERE new_rows.amount < 0
+                   GROUP BY 1, 2, 3, 4
+                ON CONFLICT (user_id, year, month, category_id)
+                DO UPDATE SET amount = "transaction_month_report".amount + EXCLUDED.amount;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION subtract_transaction_month_report() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                UPDATE "transaction_month_report" AS report
+                   SET amount = report.amount - deleted.amount
+                  FROM (
+                        SELECT old_rows.user_id,
+                               extract(year FROM old_rows.timestamp) AS year,
+                               extract(month FROM old_rows.timestamp) AS month,
+                               mcc.category_id,
+                               abs(sum(old_rows.amount)) AS amount
+                          FROM old_rows
+                          JOIN mcc ON mcc.code = old_rows.mcc
+                         WHERE old_rows.amount < 0
+                      GROUP BY 1, 2, 3, 4
+                  ) AS deleted
+                 WHERE report.user_id = deleted.user_id
+                   AND report.year = deleted.year
+                   AND report.month = deleted.month
+                   AND report.category_id = deleted.category_id;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE TRIGGER add_transaction_month_report_trigger
+        AFTER INSERT
+        ON "transaction"
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE add_transaction_month_report();
+
+    CREATE TRIGGER subtract_transaction_month_report_trigger
+        AFTER DELETE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE subtract_transaction_month_report();
+"""
+drop_month_report_triggers = """
+    DROP TRIGGER subtract_transaction_month_report_trigger ON "transaction";
+    DROP TRIGGER add_transaction_month_report_trigger ON "transaction";
+    DROP FUNCTION subtract_transaction_month_report();
+    DROP FUNCTION add_transaction_month_report();
+"""
+backfill_month_report = """
+    INSERT INTO "transaction_month_report" (user_id, year, month, category_id, amount)
+         SELECT "transaction".user_id,
+                extract(year FROM "transaction".timestamp),
+                extract(month FROM "transaction".timestamp),
+                mcc.category_id,
+                abs(sum("transaction".amount))
+           FROM "transaction"
+           JOIN mcc ON mcc.code = "transaction".mcc
+          WHERE "transaction".amount < 0
+       GROUP BY 1, 2, 3, 4;
+"""
+
+
+def upgrade():
+    op.create_table('transaction_month_report',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.SmallInteger(), nullable=False),
+    sa.Column('month', sa.SmallInteger(), nullable=False),
+    sa.Column('category_id', sa.SmallInteger(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['mcc_category.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'year', 'month', 'category_id')
+    )
+
+    # transactions inserted or deleted between backfill and triggers creation would be
+    # missed by rollup, so writes are blocked until migration transaction is committed
+    op.execute('LOCK TABLE "transaction" IN SHARE ROW EXCLUSIVE MODE')
+    op.execute(backfill_month_report)
+    op.execute(create_month_report_triggers)
+
+
+def downgrade():
+    op.execute(drop_month_report_triggers)
+
+    op.drop_table('transaction_month_report')
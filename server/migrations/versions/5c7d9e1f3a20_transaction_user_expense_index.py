@@ -0,0 +1,32 @@
+"""Transaction user expense partial covering index
+
+Revision ID: 5c7d9e1f3a20
+Revises: 8b2e5d0f6a91
+Create Date: 2020-12-09 16:21:47.260813
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c7d9e1f3a20'
+down_revision = '8b2e5d0f6a91'
+branch_labels = None
+depends_on = None
+
+# alembic 1.4 does not support INCLUDE clause for indexes
+create_expense_index = """
+    CREATE INDEX transaction_user_expense_idx
+        ON "transaction" (user_id, timestamp)
+        INCLUDE (amount, mcc)
+        WHERE amount < 0;
+"""
+
+
+def upgrade():
+    op.execute(create_expense_index)
+
+
+def downgrade():
+    op.drop_index('transaction_user_expense_idx', table_name='transaction')
@@ -0,0 +1,106 @@
+"""Transaction daily report rollup
+
+Revision ID: 8b2e5d0f6a91
+Revises: 3f9a1c2b7d4e
+Create Date: 2020-12-07 11:38:05.917264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d0f6a91'
+down_revision = '3f9a1c2b7d4e'
+branch_labels = None
+depends_on = None
+
+create_daily_report_triggers = """
+    CREATE OR REPLACE FUNCTION add_transaction_daily_report() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                INSERT INTO "transaction_daily_report" (user_id, date, amount)
+                     SELECT new_rows.user_id,
+                            new_rows.timestamp::date,
+                            abs(sum(new_rows.amount))
+                       FROM new_rows
+                      WHERE new_rows.amount < 0
+                   GROUP BY 1, 2
+                ON CONFLICT (user_id, date)
+                DO UPDATE SET amount = "transaction_daily_report".amount + EXCLUDED.amount;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION subtract_transaction_daily_report() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                UPDATE "transaction_daily_report" AS report
+                   SET amount = report.amount - deleted.amount
+                  FROM (
+                        SELECT old_rows.user_id,
+                               old_rows.timestamp::date AS date,
+                               abs(sum(old_rows.amount)) AS amount
+                          FROM old_rows
+                         WHERE old_rows.amount < 0
+                      GROUP BY 1, 2
+                  ) AS deleted
+                 WHERE report.user_id = deleted.user_id
+                   AND report.date = deleted.date;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE TRIGGER add_transaction_daily_report_trigger
+        AFTER INSERT
+        ON "transaction"
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE add_transaction_daily_report();
+
+    CREATE TRIGGER subtract_transaction_daily_report_trigger
+        AFTER DELETE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE subtract_transaction_daily_report();
+"""
+drop_daily_report_triggers = """
+    DROP TRIGGER subtract_transaction_daily_report_trigger ON "transaction";
+    DROP TRIGGER add_transaction_daily_report_trigger ON "transaction";
+    DROP FUNCTION subtract_transaction_daily_report();
+    DROP FUNCTION add_transaction_daily_report();
+"""
+backfill_daily_report = """
+    INSERT INTO "transaction_daily_report" (user_id, date, amount)
+         SELECT "transaction".user_id,
+                "transaction".timestamp::date,
+                abs(sum("transaction".amount))
+           FROM "transaction"
+          WHERE "transaction".amount < 0
+       GROUP BY 1, 2;
+"""
+
+
+def upgrade():
+    op.create_table('transaction_daily_report',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'date')
+    )
+
+    # transactions inserted or deleted between backfill and triggers creation would be
+    # missed by rollup, so writes are blocked until migration transaction is committed
+    op.execute('LOCK TABLE "transaction" IN SHARE ROW EXCLUSIVE MODE')
+    op.execute(backfill_daily_report)
+    op.execute(create_daily_report_triggers)
+
+
+def downgrade():
+    op.execute(drop_daily_report_triggers)
+
+    op.drop_table('transaction_daily_report')
@@ -0,0 +1,189 @@
+"""Partition transaction table by month
+
+Revision ID: 9d4f2a6b8c13
+Revises: 5c7d9e1f3a20
+Create Date: 2020-12-14 12:03:59.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f2a6b8c13'
+down_revision = '5c7d9e1f3a20'
+branch_labels = None
+depends_on = None
+
+drop_report_triggers = """
+    DROP TRIGGER subtract_transaction_daily_report_trigger ON "transaction";
+    DROP TRIGGER add_transaction_daily_report_trigger ON "transaction";
+    DROP TRIGGER subtract_transaction_month_report_trigger ON "transaction";
+    DROP TRIGGER add_transaction_month_report_trigger ON "transaction";
+"""
+create_report_triggers = """
+    CREATE TRIGGER add_transaction_month_report_trigger
+        AFTER INSERT
+        ON "transaction"
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE add_transaction_month_report();
+
+    CREATE TRIGGER subtract_transaction_month_report_trigger
+        AFTER DELETE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE subtract_transaction_month_report();
+
+    CREATE TRIGGER add_transaction_daily_report_trigger
+        AFTER INSERT
+        ON "transaction"
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE add_transaction_daily_report();
+
+    CREATE TRIGGER subtract_transaction_daily_report_trigger
+        AFTER DELETE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE subtract_transaction_daily_report();
+"""
+create_partition_functions = """
+    CREATE OR REPLACE FUNCTION create_transaction_partition(month_start date) RETURNS void AS
+        $BODY$
+            DECLARE
+                partition_start date := date_trunc('month', month_start);
+                partition_end date := partition_start + interval '1 month';
+                partition_name text := 'transaction_' || to_char(partition_start, 'YYYY_MM');
+            BEGIN
+                -- serialize concurrent calls from several server workers
+                PERFORM pg_advisory_xact_lock(hashtext('create_transaction_partition'));
+                IF to_regclass(partition_name) IS NOT NULL THEN
+                    RETURN;
+                END IF;
+
+                -- rows of this month that were routed to default partition block its creation,
+                -- so they are moved to the new partition (partition level statements do not
+                -- fire report triggers of transaction table)
+                CREATE TEMP TABLE transaction_default_moved ON COMMIT DROP AS
+                    WITH moved AS (
+                        DELETE FROM transaction_default
+                         WHERE timestamp >= partition_start AND timestamp < partition_end
+                     RETURNING *
+                    )
+                    SELECT * FROM moved;
+
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF "transaction" FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, partition_start, partition_end
+                );
+                EXECUTE format('INSERT INTO %I SELECT * FROM transaction_default_moved', partition_name);
+                DROP TABLE transaction_default_moved;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION create_transaction_partitions(months_ahead integer) RETURNS void AS
+        $BODY$
+            BEGIN
+                FOR month_offset IN 0..months_ahead LOOP
+                    PERFORM create_transaction_partition(
+                        (date_trunc('month', now()) + month_offset * interval '1 month')::date
+                    );
+                END LOOP;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+"""
+drop_partition_functions = """
+    DROP FUNCTION create_transaction_partitions(integer);
+    DROP FUNCTION create_transaction_partition(date);
+"""
+create_partitioned_transaction = """
+    CREATE TABLE "transaction" (
+        id varchar(255) NOT NULL,
+        user_id integer NOT NULL REFERENCES "user" (id) ON DELETE CASCADE,
+        amount numeric(12, 2) NOT NULL,
+        balance numeric(12, 2),
+        cashback numeric(12, 2),
+        mcc integer REFERENCES mcc (code),
+        timestamp timestamp without time zone NOT NULL,
+        info varchar(255) NOT NULL,
+        CONSTRAINT transaction_pkey PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+
+    CREATE TABLE transaction_default PARTITION OF "transaction" DEFAULT;
+
+    CREATE INDEX transaction_user_timestamp_idx ON "transaction" (user_id, timestamp);
+    CREATE INDEX transaction_user_expense_idx
+        ON "transaction" (user_id, timestamp)
+        INCLUDE (amount, mcc)
+        WHERE amount < 0;
+"""
+create_plain_transaction = """
+    CREATE TABLE "transaction" (
+        id varchar(255) NOT NULL,
+        user_id integer NOT NULL REFERENCES "user" (id) ON DELETE CASCADE,
+        amount numeric(12, 2) NOT NULL,
+        balance numeric(12, 2),
+        cashback numeric(12, 2),
+        mcc integer REFERENCES mcc (code),
+        timestamp timestamp without time zone NOT NULL,
+        info varchar(255) NOT NULL,
+        CONSTRAINT transaction_pkey PRIMARY KEY (id)
+    );
+
+    CREATE INDEX transaction_user_timestamp_idx ON "transaction" (user_id, timestamp);
+    CREATE INDEX transaction_user_expense_idx
+        ON "transaction" (user_id, timestamp)
+        INCLUDE (amount, mcc)
+        WHERE amount < 0;
+"""
+detach_transaction = """
+    ALTER TABLE "transaction" RENAME TO transaction_old;
+    ALTER TABLE transaction_old RENAME CONSTRAINT transaction_pkey TO transaction_old_pkey;
+    DROP INDEX transaction_user_timestamp_idx;
+    DROP INDEX transaction_user_expense_idx;
+"""
+create_existing_partitions = """
+    SELECT create_transaction_partition(month::date)
+      FROM generate_series(
+               (SELECT date_trunc('month', min(timestamp)) FROM transaction_old),
+               (SELECT date_trunc('month', max(timestamp)) FROM transaction_old),
+               interval '1 month'
+           ) AS month;
+
+    SELECT create_transaction_partitions(3);
+"""
+copy_transactions = """
+    INSERT INTO "transaction" (id, user_id, amount, balance, cashback, mcc, timestamp, info)
+         SELECT id, user_id, amount, balance, cashback, mcc, timestamp, info
+           FROM transaction_old;
+
+    DROP TABLE transaction_old;
+"""
+
+
+def upgrade():
+    op.execute(drop_report_triggers)
+    op.execute(detach_transaction)
+
+    op.execute(create_partitioned_transaction)
+    op.execute(create_partition_functions)
+    op.execute(create_existing_partitions)
+
+    # rollups already contain copied transactions, so triggers go after copying
+    op.execute(copy_transactions)
+    op.execute(create_report_triggers)
+
+
+def downgrade():
+    op.execute(drop_report_triggers)
+    op.execute(detach_transaction)
+    op.execute(drop_partition_functions)
+
+    op.execute(create_plain_transaction)
+    op.execute(copy_transactions)
+    op.execute(create_report_triggers)
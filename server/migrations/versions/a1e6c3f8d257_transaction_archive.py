@@ -0,0 +1,96 @@
+"""Transaction archive
+
+Revision ID: a1e6c3f8d257
+Revises: 9d4f2a6b8c13
+Create Date: 2020-12-17 18:44:12.730519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1e6c3f8d257'
+down_revision = '9d4f2a6b8c13'
+branch_labels = None
+depends_on = None
+
+# whole month partitions are copied to archive and dropped, default partition rows are moved;
+# both are partition level statements, so report rollups keep archived spendings
+create_archive_function = r"""
+    CREATE OR REPLACE FUNCTION archive_transactions(horizon date) RETURNS integer AS
+        $BODY$
+            DECLARE
+                old_partition record;
+                moved_count integer;
+                archived_count integer := 0;
+            BEGIN
+                PERFORM pg_advisory_xact_lock(hashtext('archive_transactions'));
+
+                FOR old_partition IN
+                    SELECT child.relname
+                      FROM pg_inherits
+                      JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+                      JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+                     WHERE parent.relname = 'transaction'
+                       AND child.relname ~ '^transaction_\d{4}_\d{2}$'
+                       AND to_date(substring(child.relname FROM '\d{4}_\d{2}$'), 'YYYY_MM')
+                           + interval '1 month' <= horizon
+                LOOP
+                    EXECUTE format(
+                        'INSERT INTO transaction_archive SELECT * FROM %I',
+                        old_partition.relname
+                    );
+                    GET DIAGNOSTICS moved_count = ROW_COUNT;
+                    archived_count := archived_count + moved_count;
+
+                    EXECUTE format('DROP TABLE %I', old_partition.relname);
+                END LOOP;
+
+                WITH moved AS (
+                    DELETE FROM transaction_default
+                     WHERE timestamp < horizon
+                 RETURNING *
+                )
+                INSERT INTO transaction_archive SELECT * FROM moved;
+                GET DIAGNOSTICS moved_count = ROW_COUNT;
+
+                RETURN archived_count + moved_count;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+"""
+drop_archive_function = """
+    DROP FUNCTION archive_transactions(date);
+"""
+
+
+def upgrade():
+    op.create_table('transaction_archive',
+    sa.Column('id', sa.String(length=255), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('cashback', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('mcc', sa.Integer(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('info', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['mcc'], ['mcc.code'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'timestamp')
+    )
+    op.create_index(
+        'transaction_archive_user_timestamp_idx',
+        'transaction_archive',
+        ['user_id', 'timestamp'],
+        unique=False
+    )
+
+    op.execute(create_archive_function)
+
+
+def downgrade():
+    op.execute(drop_archive_function)
+
+    op.drop_index('transaction_archive_user_timestamp_idx', table_name='transaction_archive')
+    op.drop_table('transaction_archive')
@@ -0,0 +1,118 @@
+"""Cache invalidation notify triggers
+
+Revision ID: a7c3e9d1f486
+Revises: f3d1b7a05c62
+Create Date: 2021-01-05 13:16:52.418730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9d1f486'
+down_revision = 'f3d1b7a05c62'
+branch_labels = None
+depends_on = None
+
+# transition tables are allowed only for triggers with single event and are visible
+# only inside trigger function, so inserted and deleted transactions have own functions
+create_notify_triggers = """
+    CREATE OR REPLACE FUNCTION notify_inserted_transactions() RETURNS TRIGGER AS
+        $BODY$
+            DECLARE
+                changed_month record;
+            BEGIN
+                FOR changed_month IN
+                    SELECT DISTINCT new_rows.user_id,
+                           extract(year FROM new_rows.timestamp)::integer AS year,
+                           extract(month FROM new_rows.timestamp)::integer AS month
+                      FROM new_rows
+                LOOP
+                    PERFORM pg_notify('cache_invalidation', json_build_object(
+                        'table', 'transaction',
+                        'user_id', changed_month.user_id,
+                        'year', changed_month.year,
+                        'month', changed_month.month
+                    )::text);
+                END LOOP;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION notify_deleted_transactions() RETURNS TRIGGER AS
+        $BODY$
+            DECLARE
+                changed_month record;
+            BEGIN
+                FOR changed_month IN
+                    SELECT DISTINCT old_rows.user_id,
+                           extract(year FROM old_rows.timestamp)::integer AS year,
+                           extract(month FROM old_rows.timestamp)::integer AS month
+                      FROM old_rows
+                LOOP
+                    PERFORM pg_notify('cache_invalidation', json_build_object(
+                        'table', 'transaction',
+                        'user_id', changed_month.user_id,
+                        'year', changed_month.year,
+                        'month', changed_month.month
+                    )::text);
+                END LOOP;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION notify_table_changed() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                PERFORM pg_notify('cache_invalidation', json_build_object('table', TG_TABLE_NAME)::text);
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE TRIGGER notify_inserted_transactions_trigger
+        AFTER INSERT
+        ON "transaction"
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE notify_inserted_transactions();
+
+    CREATE TRIGGER notify_deleted_transactions_trigger
+        AFTER DELETE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE notify_deleted_transactions();
+
+    CREATE TRIGGER notify_mcc_changed_trigger
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE
+        ON mcc
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE notify_table_changed();
+
+    CREATE TRIGGER notify_mcc_category_changed_trigger
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE
+        ON mcc_category
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE notify_table_changed();
+"""
+drop_notify_triggers = """
+    DROP TRIGGER notify_mcc_category_changed_trigger ON mcc_category;
+    DROP TRIGGER notify_mcc_changed_trigger ON mcc;
+    DROP TRIGGER notify_deleted_transactions_trigger ON "transaction";
+    DROP TRIGGER notify_inserted_transactions_trigger ON "transaction";
+    DROP FUNCTION notify_table_changed();
+    DROP FUNCTION notify_deleted_transactions();
+    DROP FUNCTION notify_inserted_transactions();
+"""
+
+
+def upgrade():
+    op.execute(create_notify_triggers)
+
+
+def downgrade():
+    op.execute(drop_notify_triggers)
@@ -0,0 +1,68 @@
+"""Transaction daily report updates
+
+Revision ID: a9d3e6f2c418
+Revises: f5c2a8e1b937
+Create Date: 2021-01-18 16:37:21.084526
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e6f2c418'
+down_revision = 'f5c2a8e1b937'
+branch_labels = None
+depends_on = None
+
+# updated transactions are subtracted from rollup as old rows and added back as new rows
+create_daily_report_trigger = """
+    CREATE OR REPLACE FUNCTION update_transaction_daily_report() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                UPDATE "transaction_daily_report" AS report
+                   SET amount = report.amount - deleted.amount
+                  FROM (
+                        SELECT old_rows.user_id,
+                               old_rows.timestamp::date AS date,
+                               abs(sum(old_rows.amount)) AS amount
+                          FROM old_rows
+                         WHERE old_rows.amount < 0
+                      GROUP BY 1, 2
+                  ) AS deleted
+                 WHERE report.user_id = deleted.user_id
+                   AND report.date = deleted.date;
+
+                INSERT INTO "transaction_daily_report" (user_id, date, amount)
+                     SELECT new_rows.user_id,
+                            new_rows.timestamp::date,
+                            abs(sum(new_rows.amount))
+                       FROM new_rows
+                      WHERE new_rows.amount < 0
+                   GROUP BY 1, 2
+                ON CONFLICT (user_id, date)
+                DO UPDATE SET amount = "transaction_daily_report".amount + EXCLUDED.amount;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE TRIGGER update_transaction_daily_report_trigger
+        AFTER UPDATE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE update_transaction_daily_report();
+"""
+drop_daily_report_trigger = """
+    DROP TRIGGER update_transaction_daily_report_trigger ON "transaction";
+    DROP FUNCTION update_transaction_daily_report();
+"""
+
+
+def upgrade():
+    op.execute(create_daily_report_trigger)
+
+
+def downgrade():
+    op.execute(drop_daily_report_trigger)
@@ -0,0 +1,41 @@
+"""Transaction info trigram index
+
+Revision ID: b5e8f2c4d719
+Revises: a7c3e9d1f486
+Create Date: 2021-01-11 17:35:06.284519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8f2c4d719'
+down_revision = 'a7c3e9d1f486'
+branch_labels = None
+depends_on = None
+
+# btree_gin provides gin operator class for user_id, so search is scoped by user within single index
+create_trigram_indexes = """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+    CREATE INDEX transaction_user_info_trgm_idx
+        ON "transaction"
+        USING gin (user_id, info gin_trgm_ops);
+    CREATE INDEX transaction_archive_user_info_trgm_idx
+        ON transaction_archive
+        USING gin (user_id, info gin_trgm_ops);
+"""
+drop_trigram_indexes = """
+    DROP INDEX transaction_archive_user_info_trgm_idx;
+    DROP INDEX transaction_user_info_trgm_idx;
+"""
+
+
+def upgrade():
+    op.execute(create_trigram_indexes)
+
+
+def downgrade():
+    op.execute(drop_trigram_indexes)
@@ -0,0 +1,57 @@
+"""Transaction surrogate key
+
+Revision ID: c4b8f1e2a937
+Revises: a1e6c3f8d257
+Create Date: 2020-12-21 11:27:40.361842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4b8f1e2a937'
+down_revision = 'a1e6c3f8d257'
+branch_labels = None
+depends_on = None
+
+# identity columns are not supported by partitioned tables, so id is filled by sequence default;
+# archive table gets columns in the same order, archive function copies rows by SELECT *
+create_transaction_surrogate_key = """
+    CREATE SEQUENCE transaction_id_seq AS bigint;
+
+    ALTER TABLE "transaction" DROP CONSTRAINT transaction_pkey;
+    ALTER TABLE "transaction" RENAME COLUMN id TO external_id;
+    ALTER TABLE "transaction" ADD COLUMN id bigint NOT NULL DEFAULT nextval('transaction_id_seq');
+    ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id;
+    ALTER TABLE "transaction" ADD CONSTRAINT transaction_pkey PRIMARY KEY (id, timestamp);
+    ALTER TABLE "transaction"
+        ADD CONSTRAINT transaction_user_external_id_key UNIQUE (user_id, external_id, timestamp);
+
+    ALTER TABLE transaction_archive DROP CONSTRAINT transaction_archive_pkey;
+    ALTER TABLE transaction_archive RENAME COLUMN id TO external_id;
+    ALTER TABLE transaction_archive ADD COLUMN id bigint NOT NULL DEFAULT nextval('transaction_id_seq');
+    ALTER TABLE transaction_archive ALTER COLUMN id DROP DEFAULT;
+    ALTER TABLE transaction_archive ADD CONSTRAINT transaction_archive_pkey PRIMARY KEY (id, timestamp);
+"""
+drop_transaction_surrogate_key = """
+    ALTER TABLE transaction_archive DROP CONSTRAINT transaction_archive_pkey;
+    ALTER TABLE transaction_archive DROP COLUMN id;
+    ALTER TABLE transaction_archive RENAME COLUMN external_id TO id;
+    ALTER TABLE transaction_archive ADD CONSTRAINT transaction_archive_pkey PRIMARY KEY (id, timestamp);
+
+    ALTER TABLE "transaction" DROP CONSTRAINT transaction_user_external_id_key;
+    ALTER TABLE "transaction" DROP CONSTRAINT transaction_pkey;
+    -- sequence is owned by the column, so it is dropped too
+    ALTER TABLE "transaction" DROP COLUMN id;
+    ALTER TABLE "transaction" RENAME COLUMN external_id TO id;
+    ALTER TABLE "transaction" ADD CONSTRAINT transaction_pkey PRIMARY KEY (id, timestamp);
+"""
+
+
+def upgrade():
+    op.execute(create_transaction_surrogate_key)
+
+
+def downgrade():
+    op.execute(drop_transaction_surrogate_key)
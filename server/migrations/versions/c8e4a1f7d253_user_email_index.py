@@ -0,0 +1,36 @@
+"""User email global index
+
+Revision ID: c8e4a1f7d253
+Revises: a9d3e6f2c418
+Create Date: 2021-01-21 11:26:03.518247
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e4a1f7d253'
+down_revision = 'a9d3e6f2c418'
+branch_labels = None
+depends_on = None
+
+# the index is used in primary database only, users created before sharding are stored there
+fill_user_email = """
+    INSERT INTO user_email (email, user_id)
+    SELECT email, id FROM "user";
+"""
+
+
+def upgrade():
+    op.create_table('user_email',
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('email'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.execute(fill_user_email)
+
+
+def downgrade():
+    op.drop_table('user_email')
@@ -0,0 +1,59 @@
+"""Transaction change txid
+
+Revision ID: d2f6a8c3e514
+Revises: b5e8f2c4d719
+Create Date: 2021-01-14 10:52:37.905126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6a8c3e514'
+down_revision = 'b5e8f2c4d719'
+branch_labels = None
+depends_on = None
+
+# change_txid is id of database transaction that inserted or last updated the row;
+# BEFORE row triggers on partitioned tables require Postgres 13.
+# archive table gets the column as well, archive function copies rows by SELECT *
+create_transaction_change_txid = """
+    ALTER TABLE "transaction" ADD COLUMN change_txid bigint NOT NULL DEFAULT txid_current();
+    CREATE INDEX transaction_user_change_txid_idx ON "transaction" (user_id, change_txid, id);
+
+    ALTER TABLE transaction_archive ADD COLUMN change_txid bigint NOT NULL DEFAULT txid_current();
+    ALTER TABLE transaction_archive ALTER COLUMN change_txid DROP DEFAULT;
+
+    CREATE OR REPLACE FUNCTION set_transaction_change_txid() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                NEW.change_txid := txid_current();
+                RETURN NEW;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE TRIGGER set_transaction_change_txid_trigger
+        BEFORE UPDATE
+        ON "transaction"
+        FOR EACH ROW
+        EXECUTE PROCEDURE set_transaction_change_txid();
+"""
+drop_transaction_change_txid = """
+    DROP TRIGGER set_transaction_change_txid_trigger ON "transaction";
+    DROP FUNCTION set_transaction_change_txid();
+
+    ALTER TABLE transaction_archive DROP COLUMN change_txid;
+
+    DROP INDEX transaction_user_change_txid_idx;
+    ALTER TABLE "transaction" DROP COLUMN change_txid;
+"""
+
+
+def upgrade():
+    op.execute(create_transaction_change_txid)
+
+
+def downgrade():
+    op.execute(drop_transaction_change_txid)
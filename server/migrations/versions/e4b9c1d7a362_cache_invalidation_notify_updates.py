@@ -0,0 +1,66 @@
+"""Cache invalidation notify updates
+
+Revision ID: e4b9c1d7a362
+Revises: d2f6a8c3e514
+Create Date: 2021-01-18 11:24:06.157392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9c1d7a362'
+down_revision = 'd2f6a8c3e514'
+branch_labels = None
+depends_on = None
+
+# updated transaction may be moved to another month,
+# so both months of old and new rows are notified
+create_notify_trigger = """
+    CREATE OR REPLACE FUNCTION notify_updated_transactions() RETURNS TRIGGER AS
+        $BODY$
+            DECLARE
+                changed_month record;
+            BEGIN
+                FOR changed_month IN
+                    SELECT DISTINCT changed_rows.user_id,
+                           extract(year FROM changed_rows.timestamp)::integer AS year,
+                           extract(month FROM changed_rows.timestamp)::integer AS month
+                      FROM (
+                          SELECT user_id, timestamp FROM old_rows
+                           UNION
+                          SELECT user_id, timestamp FROM new_rows
+                      ) AS changed_rows
+                LOOP
+                    PERFORM pg_notify('cache_invalidation', json_build_object(
+                        'table', 'transaction',
+                        'user_id', changed_month.user_id,
+                        'year', changed_month.year,
+                        'month', changed_month.month
+                    )::text);
+                END LOOP;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE TRIGGER notify_updated_transactions_trigger
+        AFTER UPDATE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE notify_updated_transactions();
+"""
+drop_notify_trigger = """
+    DROP TRIGGER notify_updated_transactions_trigger ON "transaction";
+    DROP FUNCTION notify_updated_transactions();
+"""
+
+
+def upgrade():
+    op.execute(create_notify_trigger)
+
+
+def downgrade():
+    op.execute(drop_notify_trigger)
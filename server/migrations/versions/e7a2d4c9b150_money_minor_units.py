@@ -0,0 +1,73 @@
+"""Store money in minor units
+
+Revision ID: e7a2d4c9b150
+Revises: c4b8f1e2a937
+Create Date: 2020-12-23 15:08:12.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2d4c9b150'
+down_revision = 'c4b8f1e2a937'
+branch_labels = None
+depends_on = None
+
+# column type change would rewrite partial index predicate to `(amount)::numeric < (0)::numeric`,
+# so queries filtering by `amount < 0` would not match it. The index is recreated after the change.
+drop_expense_index = """
+    DROP INDEX transaction_user_expense_idx;
+"""
+create_expense_index = """
+    CREATE INDEX transaction_user_expense_idx
+        ON "transaction" (user_id, timestamp)
+        INCLUDE (amount, mcc)
+        WHERE amount < 0;
+"""
+# column type change of partitioned table is applied to each partition
+convert_to_minor_units = """
+    ALTER TABLE "transaction"
+        ALTER COLUMN amount TYPE bigint USING round(amount * 100),
+        ALTER COLUMN balance TYPE bigint USING round(balance * 100),
+        ALTER COLUMN cashback TYPE bigint USING round(cashback * 100);
+
+    ALTER TABLE transaction_archive
+        ALTER COLUMN amount TYPE bigint USING round(amount * 100),
+        ALTER COLUMN balance TYPE bigint USING round(balance * 100),
+        ALTER COLUMN cashback TYPE bigint USING round(cashback * 100);
+
+    ALTER TABLE transaction_month_report ALTER COLUMN amount TYPE bigint USING round(amount * 100);
+    ALTER TABLE transaction_daily_report ALTER COLUMN amount TYPE bigint USING round(amount * 100);
+    ALTER TABLE "limit" ALTER COLUMN amount TYPE bigint USING round(amount * 100);
+    ALTER TABLE budget ALTER COLUMN income TYPE bigint USING round(income * 100);
+"""
+convert_to_major_units = """
+    ALTER TABLE "transaction"
+        ALTER COLUMN amount TYPE numeric(12, 2) USING amount / 100.0,
+        ALTER COLUMN balance TYPE numeric(12, 2) USING balance / 100.0,
+        ALTER COLUMN cashback TYPE numeric(12, 2) USING cashback / 100.0;
+
+    ALTER TABLE transaction_archive
+        ALTER COLUMN amount TYPE numeric(12, 2) USING amount / 100.0,
+        ALTER COLUMN balance TYPE numeric(12, 2) USING balance / 100.0,
+        ALTER COLUMN cashback TYPE numeric(12, 2) USING cashback / 100.0;
+
+    ALTER TABLE transaction_month_report ALTER COLUMN amount TYPE numeric(12, 2) USING amount / 100.0;
+    ALTER TABLE transaction_daily_report ALTER COLUMN amount TYPE numeric(12, 2) USING amount / 100.0;
+    ALTER TABLE "limit" ALTER COLUMN amount TYPE numeric(12, 2) USING amount / 100.0;
+    ALTER TABLE budget ALTER COLUMN income TYPE numeric(12, 2) USING income / 100.0;
+"""
+
+
+def upgrade():
+    op.execute(drop_expense_index)
+    op.execute(convert_to_minor_units)
+    op.execute(create_expense_index)
+
+
+def downgrade():
+    op.execute(drop_expense_index)
+    op.execute(convert_to_major_units)
+    op.execute(create_expense_index)
@@ -0,0 +1,32 @@
+"""User deleted mark
+
+Revision ID: f3d1b7a05c62
+Revises: e7a2d4c9b150
+Create Date: 2020-12-28 10:42:31.572093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3d1b7a05c62'
+down_revision = 'e7a2d4c9b150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('deleted', sa.DateTime(), nullable=True))
+    op.create_index(
+        'user_deleted_idx',
+        'user',
+        ['deleted'],
+        unique=False,
+        postgresql_where=sa.text('deleted IS NOT NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('user_deleted_idx', table_name='user')
+    op.drop_column('user', 'deleted')
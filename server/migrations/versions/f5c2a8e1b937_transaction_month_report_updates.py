@@ -0,0 +1,78 @@
+"""Transaction month report updates
+
+Revision ID: f5c2a8e1b937
+Revises: e4b9c1d7a362
+Create Date: 2021-01-18 15:02:44.630915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c2a8e1b937'
+down_revision = 'e4b9c1d7a362'
+branch_labels = None
+depends_on = None
+
+# updated transactions are subtracted from rollup as old rows and added back as new rows.
+# rollup keeps category of mcc at the moment transaction was written, so changing
+# mcc.category_id does not move already rolled up amounts to the new category
+create_month_report_trigger = """
+    CREATE OR REPLACE FUNCTION update_transaction_month_report() RETURNS TRIGGER AS
+        $BODY$
+            BEGIN
+                UPDATE "transaction_month_report" AS report
+                   SET amount = report.amount - deleted.amount
+                  FROM (
+                        SELECT old_rows.user_id,
+                               extract(year FROM old_rows.timestamp) AS year,
+                               extract(month FROM old_rows.timestamp) AS month,
+                               mcc.category_id,
+                               abs(sum(old_rows.amount)) AS amount
+                          FROM old_rows
+                          JOIN mcc ON mcc.code = old_rows.mcc
+                         WHERE old_rows.amount < 0
+                      GROUP BY 1, 2, 3, 4
+                  ) AS deleted
+                 WHERE report.user_id = deleted.user_id
+                   AND report.year = deleted.year
+                   AND report.month = deleted.month
+                   AND report.category_id = deleted.category_id;
+
+                INSERT INTO "transaction_month_report" (user_id, year, month, category_id, amount)
+                     SELECT new_rows.user_id,
+                            extract(year FROM new_rows.timestamp),
+                            extract(month FROM new_rows.timestamp),
+                            mcc.category_id,
+                            abs(sum(new_rows.amount))
+                       FROM new_rows
+                       JOIN mcc ON mcc.code = new_rows.mcc
+                      WHERE new_rows.amount < 0
+                   GROUP BY 1, 2, 3, 4
+                ON CONFLICT (user_id, year, month, category_id)
+                DO UPDATE SET amount = "transaction_month_report".amount + EXCLUDED.amount;
+                RETURN NULL;
+            END
+        $BODY$
+    LANGUAGE plpgsql;
+
+    CREATE TRIGGER update_transaction_month_report_trigger
+        AFTER UPDATE
+        ON "transaction"
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT
+    EXECUTE PROCEDURE update_transaction_month_report();
+"""
+drop_month_report_trigger = """
+    DROP TRIGGER update_transaction_month_report_trigger ON "transaction";
+    DROP FUNCTION update_transaction_month_report();
+"""
+
+
+def upgrade():
+    op.execute(create_month_report_trigger)
+
+
+def downgrade():
+    op.execute(drop_month_report_trigger)